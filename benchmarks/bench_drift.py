@@ -0,0 +1,165 @@
+"""Offline benchmark for the drift_detect functions.
+
+Times population_stability_index (per-column loop and batched), the KS loop, the fused numeric kernel
+(KS + PSI + Wasserstein from one sort), chi_square_test
+(value_counts and high-cardinality modes) and the Page-Hinkley online detector (default settings on a
+N(0, 1) stream, which alarms every ~1.6k events) over sweeps of row count, column count and categorical
+cardinality, reporting throughput (rows/s), peak traced memory and the scaling curve of each sweep.
+Runs without Spark or a Databricks runtime.
+
+    python benchmarks/bench_drift.py                        # quick preset
+    python benchmarks/bench_drift.py --preset full --output bench.json
+    python benchmarks/bench_drift.py --compare bench.json   # exit 1 on a >25% slowdown
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import drift_detect  # noqa: E402
+
+PRESETS = {
+    "quick": {
+        "rows": [1_000, 10_000, 100_000, 1_000_000],
+        "cols": [1, 10, 100, 500],
+        "cardinality": [3, 100, 10_000, 100_000],
+    },
+    "full": {
+        "rows": [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000],
+        "cols": [1, 10, 100, 1_000, 5_000],
+        "cardinality": [3, 100, 10_000, 1_000_000],
+    },
+}
+SWEEP_FIXED = {"rows": 100_000, "cols": 1, "cardinality": 3}
+CATEGORICAL_CASES = {"chi_square", "chi_square_hc"}
+SINGLE_COLUMN_CASES = CATEGORICAL_CASES | {"page_hinkley"}
+
+
+def generate_synthetic(n_rows, n_cols, cardinality, seed=42):
+    # Same shapes as the notebook's SYNTHETIC DATA GENERATION cell: N(50, 10) baseline vs N(60, 12)
+    # current numerics, categorical probabilities shifted between the two windows
+    rng = np.random.default_rng(seed)
+    baseline_num = rng.normal(loc=50, scale=10, size=(n_rows, n_cols))
+    current_num = rng.normal(loc=60, scale=12, size=(n_rows, n_cols))
+    if cardinality == 3:
+        categories = np.array(["A", "B", "C"])
+        baseline_p, current_p = [0.6, 0.3, 0.1], [0.4, 0.2, 0.4]
+    else:
+        categories = np.array([f"cat_{i}" for i in range(cardinality)])
+        ranks = np.arange(1, cardinality + 1)
+        baseline_p = 1 / ranks / np.sum(1 / ranks)
+        current_p = 1 / ranks[::-1] ** 0.5 / np.sum(1 / ranks[::-1] ** 0.5)
+    baseline_cat = pd.Series(categories[rng.choice(cardinality, size=n_rows, p=baseline_p)])
+    current_cat = pd.Series(categories[rng.choice(cardinality, size=n_rows, p=current_p)])
+    return baseline_num, current_num, baseline_cat, current_cat
+
+
+def measure(fn, repeat=3):
+    # Best-of-N wall time and the peak memory traced during one call
+    fn()
+    best = min(_timed(fn) for _ in range(repeat))
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def benchmark_cases(n_rows, n_cols, cardinality):
+    baseline_num, current_num, baseline_cat, current_cat = generate_synthetic(n_rows, n_cols, cardinality)
+    return {
+        "psi_loop": lambda: [drift_detect.population_stability_index(baseline_num[:, j], current_num[:, j]) for j in range(n_cols)],
+        "psi_batch": lambda: drift_detect.population_stability_index_batch(baseline_num, current_num),
+        "fused": lambda: drift_detect.numeric_drift_kernel(baseline_num, current_num),
+        "ks_loop": lambda: [stats.ks_2samp(baseline_num[:, j], current_num[:, j]) for j in range(n_cols)],
+        "chi_square": lambda: drift_detect.chi_square_test(baseline_cat, current_cat),
+        "chi_square_hc": lambda: drift_detect.chi_square_test_high_cardinality(baseline_cat, current_cat),
+        "page_hinkley": lambda: drift_detect.PageHinkley().update((baseline_num[:, 0] - 50) / 10),
+    }
+
+
+def run(preset, max_cells, repeat, cases):
+    records = []
+    for sweep, values in PRESETS[preset].items():
+        for value in values:
+            params = dict(SWEEP_FIXED, **{sweep: value})
+            if sweep == "cardinality":
+                # Enough rows that every category is seen ~10 times
+                params["rows"] = max(SWEEP_FIXED["rows"], 10 * value)
+            if params["rows"] * params["cols"] > max_cells or params["cardinality"] > params["rows"]:
+                continue
+            # Categorical cost does not depend on the numeric column count and vice versa
+            wanted = [c for c in cases if not (sweep == "cols" and c in SINGLE_COLUMN_CASES)
+                      and not (sweep == "cardinality" and c not in CATEGORICAL_CASES)]
+            fns_for_size = benchmark_cases(params["rows"], params["cols"], params["cardinality"])
+            for case in wanted:
+                seconds, peak = measure(fns_for_size[case], repeat)
+                cells = params["rows"] * (1 if case in SINGLE_COLUMN_CASES else params["cols"])
+                records.append({"sweep": sweep, "case": case, **params, "seconds": seconds,
+                                "rows_per_s": cells / seconds, "peak_mb": peak / 2**20})
+                print(f"{sweep:<12}{case:<15}rows={params['rows']:<11}cols={params['cols']:<6}"
+                      f"card={params['cardinality']:<9}{seconds * 1e3:>10.2f} ms{cells / seconds:>14.3e} rows/s"
+                      f"{peak / 2**20:>10.1f} MB", flush=True)
+    return records
+
+
+def print_scaling(records):
+    # Log-log slope of time vs the swept parameter: ~1 means linear scaling
+    print("\nscaling exponents (d log time / d log size)")
+    frame = pd.DataFrame(records)
+    for (sweep, case), group in frame.groupby(["sweep", "case"]):
+        if len(group) > 1:
+            # The cardinality sweep also grows rows with cardinality, so its slope is of the per-row time
+            seconds = group["seconds"] / group["rows"] if sweep == "cardinality" else group["seconds"]
+            slope = np.polyfit(np.log(group[sweep]), np.log(seconds), 1)[0]
+            print(f"  {sweep:<12}{case:<15}{slope:6.2f}")
+
+
+def compare(records, reference_path, tolerance):
+    def key(r):
+        return r["sweep"], r["case"], r["rows"], r["cols"], r["cardinality"]
+
+    reference = {key(r): r for r in json.loads(Path(reference_path).read_text())}
+    regressions = [(r, reference[key(r)]) for r in records
+                   if key(r) in reference and r["seconds"] > reference[key(r)]["seconds"] * tolerance]
+    for current, previous in regressions:
+        print(f"REGRESSION {key(current)}: {previous['seconds'] * 1e3:.2f} ms -> {current['seconds'] * 1e3:.2f} ms")
+    return not regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--cases", nargs="+",
+                        default=["psi_loop", "psi_batch", "ks_loop", "fused", "chi_square", "chi_square_hc", "page_hinkley"])
+    parser.add_argument("--max-cells", type=float, default=2e8, help="skip sizes with more rows x cols than this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown ratio for --compare")
+    args = parser.parse_args()
+
+    records = run(args.preset, args.max_cells, args.repeat, args.cases)
+    print_scaling(records)
+    if args.output:
+        Path(args.output).write_text(json.dumps(records, indent=1))
+    if args.compare and not compare(records, args.compare, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Feature drift detection: KS / PSI / chi-square tests against a baseline, on pandas or Spark."""
+from .arrow import arrow_to_spark, enable_arrow, numeric_matrix, spark_to_arrow
+from .backfill import backfill_drift, spark_backfill_drift
+from .cache import BreakpointCache, content_hash, table_version
+from .functions import (
+    chi_square_statistic,
+    chi_square_statistic_batch,
+    chi_square_test,
+    chi_square_test_high_cardinality,
+    collapse_long_tail,
+    numeric_drift_kernel,
+    population_stability_index,
+    population_stability_index_batch,
+)
+from .history import compact_drift_history, drift_frequency, write_drift_history
+from .incremental import incremental_drift, load_incremental_state, save_incremental_state, spark_incremental_drift
+from .metrics import DIVERGENCE_METRICS, divergence_metrics, register_divergence
+from .multivariate import (
+    MULTIVARIATE_FEATURE,
+    build_encoder,
+    domain_classifier_auc,
+    encode_features,
+    multivariate_drift_tests,
+    rff_mmd_test,
+    spark_multivariate_drift_tests,
+)
+from .ood import OOD_SCORE_COL, add_ood_score, ood_scores, spark_add_ood_score
+from .online import ADWIN, DDM, PageHinkley, online_drift_results
+from .parallel import factorize_columns, map_columns
+from .prescreen import file_statistics, prescreen_drift, spark_file_statistics
+from .planner import compile_drift_plan, run_planned_drift_tests, spark_plan_summaries, summary_ks_2samp
+from .profile import (
+    BASELINE_PROFILE_SCHEMA,
+    bin_counts_from_profile,
+    build_baseline_profile,
+    chi_square_test_from_profile,
+    ks_test_from_profile,
+    load_baseline_profile,
+    population_stability_index_from_profile,
+    profile_breakpoints,
+    save_baseline_profile,
+    spark_build_baseline_profile,
+)
+from .results import (
+    RESULT_COLUMNS,
+    RESULT_SCHEMA,
+    DriftResults,
+    assemble_results,
+    histogram_metrics,
+    results_frame,
+    run_drift_tests,
+    run_spark_drift_tests,
+)
+from .profile_store import HistogramStore
+from .retrain import drift_detected, feature_priority, first_drifted_feature, retrain_model, spark_first_drifted_feature
+from .segments import concat_results, segment_drift_tests, spark_segment_drift_tests
+from .sequential import sequential_drift_tests, spark_chunks
+from .sketch import KLLSketch, sketch_ks_2samp, spark_kll_sketches
+
+__all__ = [
+    "ADWIN",
+    "BASELINE_PROFILE_SCHEMA",
+    "BreakpointCache",
+    "DDM",
+    "DIVERGENCE_METRICS",
+    "DriftResults",
+    "HistogramStore",
+    "KLLSketch",
+    "MULTIVARIATE_FEATURE",
+    "OOD_SCORE_COL",
+    "PageHinkley",
+    "RESULT_COLUMNS",
+    "RESULT_SCHEMA",
+    "add_ood_score",
+    "arrow_to_spark",
+    "assemble_results",
+    "backfill_drift",
+    "bin_counts_from_profile",
+    "build_baseline_profile",
+    "build_encoder",
+    "chi_square_statistic",
+    "chi_square_statistic_batch",
+    "chi_square_test",
+    "chi_square_test_from_profile",
+    "chi_square_test_high_cardinality",
+    "collapse_long_tail",
+    "compile_drift_plan",
+    "concat_results",
+    "compact_drift_history",
+    "content_hash",
+    "drift_detected",
+    "divergence_metrics",
+    "domain_classifier_auc",
+    "drift_frequency",
+    "enable_arrow",
+    "encode_features",
+    "factorize_columns",
+    "feature_priority",
+    "file_statistics",
+    "first_drifted_feature",
+    "histogram_metrics",
+    "incremental_drift",
+    "ks_test_from_profile",
+    "load_baseline_profile",
+    "load_incremental_state",
+    "map_columns",
+    "multivariate_drift_tests",
+    "numeric_drift_kernel",
+    "numeric_matrix",
+    "online_drift_results",
+    "ood_scores",
+    "population_stability_index",
+    "population_stability_index_batch",
+    "population_stability_index_from_profile",
+    "prescreen_drift",
+    "profile_breakpoints",
+    "register_divergence",
+    "results_frame",
+    "retrain_model",
+    "rff_mmd_test",
+    "run_drift_tests",
+    "run_planned_drift_tests",
+    "run_spark_drift_tests",
+    "save_baseline_profile",
+    "save_incremental_state",
+    "segment_drift_tests",
+    "sequential_drift_tests",
+    "sketch_ks_2samp",
+    "spark_add_ood_score",
+    "spark_backfill_drift",
+    "spark_build_baseline_profile",
+    "spark_chunks",
+    "spark_file_statistics",
+    "spark_first_drifted_feature",
+    "spark_incremental_drift",
+    "spark_kll_sketches",
+    "spark_multivariate_drift_tests",
+    "spark_plan_summaries",
+    "spark_segment_drift_tests",
+    "spark_to_arrow",
+    "summary_ks_2samp",
+    "table_version",
+    "write_drift_history",
+]
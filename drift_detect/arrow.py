@@ -0,0 +1,66 @@
+"""Columnar Arrow data path: Spark <-> pyarrow transfer and drift inputs taken straight from Arrow buffers.
+
+Feature columns are read as pyarrow arrays and turned into the numeric matrix / category codes the drift
+tests consume without an intermediate pandas DataFrame; results and synthetic tables are written through
+Arrow with explicit schemas so Spark never runs an inference pass.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def enable_arrow(spark, max_records_per_batch=None):
+    # Arrow for toPandas/createDataFrame, silently falling back to the row path for unsupported types
+    spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+    spark.conf.set("spark.sql.execution.arrow.pyspark.fallback.enabled", "true")
+    if max_records_per_batch is not None:
+        spark.conf.set("spark.sql.execution.arrow.maxRecordsPerBatch", str(max_records_per_batch))
+
+
+def spark_to_arrow(sdf):
+    if hasattr(sdf, "toArrow"):   # Spark >= 4.0
+        return sdf.toArrow()
+    if hasattr(sdf, "_collect_as_arrow"):   # the Arrow path toPandas uses on Spark 3.x
+        from pyspark.sql.pandas.types import to_arrow_schema
+
+        return pa.Table.from_batches(sdf._collect_as_arrow(), schema=to_arrow_schema(sdf.schema))
+    return pa.Table.from_pandas(sdf.toPandas(), preserve_index=False)
+
+
+def arrow_to_spark(spark, table, schema):
+    # schema: Spark DDL string matching the table, so createDataFrame skips type inference
+    try:
+        return spark.createDataFrame(table, schema=schema)   # Spark >= 4.0 accepts pyarrow tables
+    except TypeError:
+        return spark.createDataFrame(table.to_pandas(), schema=schema)
+
+
+def numeric_matrix(data, cols):
+    # (rows x features) float64 matrix in column-major order: one copy straight out of the Arrow chunks
+    # (nulls become NaN). pandas input is accepted for callers that already hold a DataFrame.
+    if not isinstance(data, pa.Table):
+        return np.asfortranarray(data[cols].to_numpy(dtype=float)) if len(cols) else np.zeros((len(data), 0))
+    matrix = np.empty((data.num_rows, len(cols)), order="F")
+    for j, col in enumerate(cols):
+        offset = 0
+        for chunk in data.column(col).chunks:
+            matrix[offset:offset + len(chunk), j] = chunk.to_numpy(zero_copy_only=False)
+            offset += len(chunk)
+    return matrix
+
+
+def factorize_arrow_columns(table, cols):
+    # Dictionary-encode each column: int64 codes (-1 for nulls) plus the per-column dictionary values
+    codes, uniques = np.empty((table.num_rows, len(cols)), dtype=np.int64, order="F"), []
+    for j, col in enumerate(cols):
+        column = table.column(col).combine_chunks()
+        encoded = column if pa.types.is_dictionary(column.type) else column.dictionary_encode()
+        codes[:, j] = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+        uniques.append(encoded.dictionary.to_pylist())
+    return codes, uniques
+
+
+def arrow_category_counts(array):
+    counts = pc.value_counts(pc.drop_null(array))
+    return pd.Series(counts.field("counts").to_numpy(), index=counts.field("values").to_pylist())
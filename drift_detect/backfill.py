@@ -0,0 +1,134 @@
+"""Historical drift backfill: one drift run per day of a source table from a single grouped aggregation.
+
+The source is partitioned by the calendar day of a date column. Per-day PSI bin counts and category
+counts for every feature come from one grouped pass (segments.segment_counts locally, one groupBy job on
+Spark). All day x feature tests are then evaluated as array operations against the baseline profile:
+PSI for numeric features (metric_name "psi"), and chi-square with categorical PSI as the effect size for
+categorical ones. Each day becomes its own run, with run_id "backfill-<date>" and window_start at
+midnight UTC, so re-running a day updates its history rows instead of duplicating them.
+
+Days are processed in chunks of chunk_days (all at once when None). With a checkpoint_dir, each finished
+chunk's results are saved as a Parquet file, and an interrupted backfill resumes at the first missing
+chunk. The assembled results are written to the history table in one MERGE (one Delta commit).
+Local days are UTC days. On Spark they are days in the session time zone (UTC on Databricks by default).
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cache import _digest, content_hash
+from .profile import profile_breakpoints
+from .results import RESULT_ARROW_SCHEMA
+from .segments import _segment_results, concat_results, segment_counts, spark_segment_counts
+
+_DAY_COL = "__day"
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def _epoch_day(value):
+    value = pd.Timestamp(value)
+    value = value.tz_localize("UTC") if value.tz is None else value.tz_convert("UTC")
+    return (value - _EPOCH) // pd.Timedelta(days=1)
+
+
+def _day_chunks(first_day, end_day, chunk_days):
+    step = chunk_days or max(end_day - first_day, 1)
+    return [(lo, min(lo + step, end_day)) for lo in range(first_day, end_day, step)]
+
+
+def _daily_results(profile, counts, numeric_cols, categorical_cols, alpha):
+    # _segment_results with one "segment" per day, turned into per-day whole-window runs
+    table = _segment_results(profile, counts, None, numeric_cols, categorical_cols, alpha, "backfill", None)
+    days = counts["keys"][_DAY_COL].to_numpy(dtype=np.int64)[counts["segments"].get_indexer(table.column("segment").to_pylist())]
+    window_start = _EPOCH + pd.to_timedelta(days, unit="D")
+    run_id = np.char.add("backfill-", window_start.strftime("%Y-%m-%d").to_numpy().astype(str))
+    table = table.set_column(0, RESULT_ARROW_SCHEMA.field("run_id"), pa.array(run_id, pa.string()))
+    table = table.set_column(1, RESULT_ARROW_SCHEMA.field("window_start"),
+                             pa.array(window_start, RESULT_ARROW_SCHEMA.field("window_start").type))
+    table = table.set_column(3, RESULT_ARROW_SCHEMA.field("segment"), pa.nulls(table.num_rows, pa.string()))
+    return table.sort_by("window_start")
+
+
+def _run_chunks(count_days, profile, numeric_cols, categorical_cols, first_day, end_day, alpha, chunk_days,
+                checkpoint_dir):
+    # count_days(lo, hi): per-day counts for epoch days [lo, hi), in segment_counts' format
+    if checkpoint_dir is not None:
+        # A changed feature list, alpha or baseline profile starts a fresh set of checkpoints
+        baseline = content_hash(profile_breakpoints(profile, numeric_cols)) if numeric_cols else ""
+        checkpoint_dir = Path(checkpoint_dir) / _digest(numeric_cols, categorical_cols, alpha, baseline,
+                                                        [list(profile.loc[col, "categories"]) for col in categorical_cols])
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    tables = []
+    for lo, hi in _day_chunks(first_day, end_day, chunk_days):
+        path = checkpoint_dir / f"{lo}-{hi}.parquet" if checkpoint_dir is not None else None
+        if path is not None and path.exists():
+            tables.append(pq.read_table(path, schema=RESULT_ARROW_SCHEMA))
+            continue
+        table = _daily_results(profile, count_days(lo, hi), numeric_cols, categorical_cols, alpha)
+        if path is not None:
+            tmp = path.with_name(f"{path.stem}.tmp.parquet")
+            pq.write_table(table, tmp)
+            tmp.replace(path)
+        tables.append(table)
+    return concat_results(*tables) if tables else RESULT_ARROW_SCHEMA.empty_table()
+
+
+def backfill_drift(profile, source, date_col, numeric_cols, categorical_cols, start=None, end=None, alpha=0.05,
+                   chunk_days=None, checkpoint_dir=None):
+    """Per-day drift results for a pandas DataFrame or pyarrow Table over the days [start, end).
+
+    start / end default to the first day in source and the day after the last one.
+    """
+    columns = [date_col, *numeric_cols, *categorical_cols]
+    frame = source[columns].copy() if isinstance(source, pd.DataFrame) else source.select(columns).to_pandas()
+    frame = frame[frame[date_col].notna()]
+    frame[_DAY_COL] = (pd.to_datetime(frame[date_col], utc=True) - _EPOCH) // pd.Timedelta(days=1)
+    if frame.empty and (start is None or end is None):
+        return RESULT_ARROW_SCHEMA.empty_table()
+    first_day = _epoch_day(start) if start is not None else int(frame[_DAY_COL].min())
+    end_day = _epoch_day(end) if end is not None else int(frame[_DAY_COL].max()) + 1
+    breakpoints = profile_breakpoints(profile, numeric_cols)
+
+    def count_days(lo, hi):
+        days = frame[(frame[_DAY_COL] >= lo) & (frame[_DAY_COL] < hi)]
+        return segment_counts(days, [_DAY_COL], numeric_cols, breakpoints, categorical_cols)
+
+    return _run_chunks(count_days, profile, numeric_cols, categorical_cols, first_day, end_day, alpha, chunk_days,
+                       checkpoint_dir)
+
+
+def spark_backfill_drift(profile, source_sdf, date_col, numeric_cols, categorical_cols, start=None, end=None,
+                         alpha=0.05, chunk_days=None, checkpoint_dir=None, output_table=None):
+    """backfill_drift on a Spark DataFrame: one groupBy(day, feature, bucket / category) job per chunk.
+
+    With output_table, all days are merged into that history table in one commit.
+    """
+    from pyspark.sql import functions as F
+
+    from .history import write_drift_history
+
+    daily = (source_sdf.where(F.col(date_col).isNotNull())
+             .withColumn(_DAY_COL, F.datediff(F.to_date(date_col), F.lit("1970-01-01")).cast("long")))
+    if start is None or end is None:
+        bounds = daily.agg(F.min(_DAY_COL).alias("first"), F.max(_DAY_COL).alias("last")).first()
+        if bounds["first"] is None:
+            return RESULT_ARROW_SCHEMA.empty_table()
+    first_day = _epoch_day(start) if start is not None else bounds["first"]
+    end_day = _epoch_day(end) if end is not None else bounds["last"] + 1
+    breakpoints = profile_breakpoints(profile, numeric_cols)
+
+    def count_days(lo, hi):
+        # Bounds on the date column itself so partition pruning / data skipping apply
+        lo_date, hi_date = (str((_EPOCH + pd.Timedelta(days=d)).date()) for d in (lo, hi))
+        days = daily.where((F.to_date(date_col) >= F.lit(lo_date).cast("date"))
+                           & (F.to_date(date_col) < F.lit(hi_date).cast("date")))
+        return spark_segment_counts(days, [_DAY_COL], numeric_cols, breakpoints, categorical_cols)
+
+    results = _run_chunks(count_days, profile, numeric_cols, categorical_cols, first_day, end_day, alpha, chunk_days,
+                          checkpoint_dir)
+    if output_table is not None and results.num_rows:
+        write_drift_history(results, output_table, source_sdf.sparkSession)
+    return results
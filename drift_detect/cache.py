@@ -0,0 +1,101 @@
+"""Quantile breakpoint cache keyed by baseline table version.
+
+PSI breakpoints depend only on the baseline, so repeated runs against an unchanged baseline can reuse
+them. Entries are keyed on (table, version, column, buckets), where version is the Delta table version
+or a content hash. An in-process LRU tier sits in front of an optional on-disk tier (one .npy file per
+entry, e.g. on a Unity Catalog volume). Storing a new version of a (table, column, buckets) entry evicts
+the old one from both tiers.
+"""
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+def _digest(*parts):
+    return hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+
+def content_hash(values):
+    # Version stand-in for in-memory baselines: hashing is linear, the percentile selection it replaces is not
+    values = np.ascontiguousarray(values)
+    return hashlib.blake2b(values.tobytes() + str((values.dtype, values.shape)).encode(), digest_size=16).hexdigest()
+
+
+def table_version(table, spark=None):
+    # Delta version for metastore tables and local Delta directories, content hash for other local files
+    path = Path(table)
+    if (path / "_delta_log").is_dir():
+        from deltalake import DeltaTable   # optional dependency: pip install drift-detect[delta]
+
+        return DeltaTable(str(path)).version()
+    if path.is_file():
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    from .spark_backend import get_spark
+
+    return get_spark(spark).sql(f"DESCRIBE HISTORY {table} LIMIT 1").first()["version"]
+
+
+class BreakpointCache:
+    """Two-tier (in-process LRU + optional directory) cache of per-column PSI breakpoints."""
+
+    def __init__(self, maxsize=256, directory=None):
+        self.maxsize = maxsize
+        self.directory = Path(directory) if directory is not None else None
+        self._entries = OrderedDict()   # (table, column, buckets) -> (version, breakpoints)
+        self.hits = self.misses = 0
+
+    def _path(self, table, version, column, buckets):
+        return self.directory / _digest(table, column, buckets) / f"{_digest(version)}.npy"
+
+    def get(self, table, version, column, buckets):
+        slot = (table, column, buckets)
+        entry = self._entries.get(slot)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return entry[1]
+        if self.directory is not None:
+            path = self._path(table, version, column, buckets)
+            if path.exists():
+                breakpoints = np.load(path)
+                self._remember(slot, version, breakpoints)
+                self.hits += 1
+                return breakpoints
+        self.misses += 1
+        return None
+
+    def put(self, table, version, column, buckets, breakpoints):
+        breakpoints = np.array(breakpoints, dtype=float)
+        self._remember((table, column, buckets), version, breakpoints)
+        if self.directory is not None:
+            path = self._path(table, version, column, buckets)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            for stale in path.parent.glob("*.npy"):   # older baseline versions of this entry
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+            tmp = path.with_name(f"{path.stem}.tmp.npy")
+            np.save(tmp, breakpoints)
+            tmp.replace(path)
+        return breakpoints
+
+    def _remember(self, slot, version, breakpoints):
+        self._entries[slot] = (version, breakpoints)
+        self._entries.move_to_end(slot)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def breakpoints(self, table, version, cols, buckets, compute):
+        """(buckets + 1) x len(cols) breakpoints; compute(missing_cols) fills the misses in one call."""
+        cached = [self.get(table, version, col, buckets) for col in cols]
+        missing = [col for col, found in zip(cols, cached) if found is None]
+        if missing:
+            computed = np.asarray(compute(missing), dtype=float).reshape(buckets + 1, len(missing))
+            fresh = {col: self.put(table, version, col, buckets, computed[:, k]) for k, col in enumerate(missing)}
+            cached = [fresh[col] if found is None else found for col, found in zip(cols, cached)]
+        return np.column_stack(cached) if cached else np.zeros((buckets + 1, 0))
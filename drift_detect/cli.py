@@ -0,0 +1,177 @@
+"""``drift-detect`` command line entry point."""
+import argparse
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+
+from .backfill import backfill_drift
+from .incremental import incremental_drift, load_incremental_state, save_incremental_state
+from .io import iter_batches, open_dataset, read_table, write_table
+from .multivariate import multivariate_drift_tests
+from .ood import add_ood_score
+from .prescreen import file_statistics, prescreen_drift
+from .profile import build_baseline_profile, load_baseline_profile, save_baseline_profile
+from .results import results_frame, run_drift_tests
+from .retrain import drift_detected, retrain_model
+from .segments import concat_results, segment_drift_tests
+from .sequential import sequential_drift_tests
+
+
+def _split_columns(value):
+    return [c for c in value.split(",") if c] if value is not None else None
+
+
+def _infer_columns(schema):
+    numeric = [f.name for f in schema if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)]
+    return numeric, [name for name in schema.names if name not in numeric]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="drift-detect",
+        description="Compare a current window against a baseline (Parquet, CSV or Delta paths) and report drift.",
+    )
+    parser.add_argument("--current", required=True, help="current window table path")
+    parser.add_argument("--baseline", help="baseline table path (needed unless --profile already exists)")
+    parser.add_argument("--profile", help="baseline profile Parquet; built from --baseline when missing")
+    parser.add_argument("--numeric-cols", help="comma-separated numeric features (default: inferred)")
+    parser.add_argument("--categorical-cols", help="comma-separated categorical features (default: inferred)")
+    parser.add_argument("--output", help="write results to this .parquet/.csv path instead of stdout")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level")
+    parser.add_argument("--buckets", type=int, default=10, help="PSI buckets")
+    parser.add_argument("--ks-sketch-size", type=int, default=2048)
+    parser.add_argument("--max-categories", type=int,
+                        help="collapse categories beyond the most frequent N - 1 into one 'other' bucket")
+    parser.add_argument("--numeric-kernel", choices=["separate", "fused"], default="separate",
+                        help="'fused': one sort per sample for KS + PSI (asymptotic KS p-value)")
+    parser.add_argument("--metrics", help="comma-separated extra divergence metrics from the same histograms "
+                                          "(psi, kl, js, hellinger, tv)")
+    parser.add_argument("--segment-by", help="comma-separated columns; adds PSI / chi-square rows per segment")
+    parser.add_argument("--multivariate", choices=["mmd", "classifier"],
+                        help="add one joint-distribution row: random Fourier feature MMD or domain-classifier AUC "
+                             "(needs --baseline)")
+    parser.add_argument("--backfill-by", metavar="DATE_COL",
+                        help="one run per day of DATE_COL in --current (PSI / chi-square per day) instead of one window")
+    parser.add_argument("--chunk-days", type=int, help="--backfill-by: days per aggregation / checkpoint")
+    parser.add_argument("--checkpoint-dir", help="--backfill-by: resume from the per-chunk results saved here")
+    parser.add_argument("--prescreen", action="store_true",
+                        help="flag features file statistics prove drifted; only the rest are scanned (needs --baseline)")
+    parser.add_argument("--incremental-state", metavar="PATH",
+                        help="Delta --current: fold only the rows changed since the version saved in this Parquet "
+                             "state file (PSI / chi-square)")
+    parser.add_argument("--sequential", action="store_true",
+                        help="scan the current window in batches and stop once every verdict is certain")
+    parser.add_argument("--delta", type=float, default=0.01, help="--sequential: chance of a wrong early verdict")
+    parser.add_argument("--executor", choices=["serial", "thread", "process"], default="serial")
+    parser.add_argument("--workers", type=int, help="executor pool size (default: CPU count)")
+    parser.add_argument("--ood-output", metavar="PATH",
+                        help="also write the current rows with a per-row ood_score column (.parquet/.csv)")
+    parser.add_argument("--retrain-model", help="retrain and register this MLflow model when drift is detected")
+    parser.add_argument("--fail-on-drift", action="store_true", help="exit with status 1 when drift is detected")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    numeric_cols = _split_columns(args.numeric_cols)
+    categorical_cols = _split_columns(args.categorical_cols)
+    segment_by = _split_columns(args.segment_by) or []
+    non_features = segment_by + ([args.backfill_by] if args.backfill_by else [])
+    columns = None if numeric_cols is None or categorical_cols is None else numeric_cols + categorical_cols + non_features
+    if args.sequential or args.incremental_state:
+        current = open_dataset(args.current)   # schema only; rows are read in batches or as changes
+    else:
+        current = read_table(args.current, columns)
+    if columns is None:
+        inferred_numeric, inferred_categorical = [[c for c in inferred if c not in non_features]
+                                                  for inferred in _infer_columns(current.schema)]
+        numeric_cols = inferred_numeric if numeric_cols is None else numeric_cols
+        categorical_cols = inferred_categorical if categorical_cols is None else categorical_cols
+
+    baseline = None
+    if args.profile and Path(args.profile).exists():
+        profile = load_baseline_profile(path=args.profile)
+    elif args.baseline:
+        baseline = read_table(args.baseline, numeric_cols + categorical_cols)
+        profile = build_baseline_profile(baseline, numeric_cols, categorical_cols, args.buckets, args.ks_sketch_size)
+        if args.profile:
+            save_baseline_profile(profile, path=args.profile)
+        profile = profile.set_index("feature", drop=False)
+    else:
+        raise SystemExit("drift-detect: --baseline is required when --profile does not exist yet")
+    if args.backfill_by and (segment_by or args.multivariate):
+        raise SystemExit("drift-detect: --backfill-by cannot be combined with --segment-by or --multivariate")
+    if args.multivariate and not args.baseline:
+        raise SystemExit("drift-detect: --multivariate needs --baseline (the profile holds no joint distribution)")
+    if args.incremental_state and (args.backfill_by or segment_by or args.sequential or args.prescreen):
+        raise SystemExit("drift-detect: --incremental-state cannot be combined with --backfill-by, --segment-by, "
+                         "--sequential or --prescreen")
+    if args.prescreen and (args.backfill_by or not args.baseline):
+        raise SystemExit("drift-detect: --prescreen needs --baseline and cannot be combined with --backfill-by")
+
+    run_id = window_start = prescreen_results = None
+    test_numeric, test_categorical = numeric_cols, categorical_cols
+    if args.prescreen:
+        prescreen_results, test_numeric, test_categorical = prescreen_drift(
+            file_statistics(args.baseline), file_statistics(args.current), numeric_cols, categorical_cols, args.alpha)
+        run_id = prescreen_results.column("run_id")[0].as_py() if prescreen_results.num_rows else None
+        window_start = prescreen_results.column("window_start")[0].as_py() if prescreen_results.num_rows else None
+        print(f"Pre-screen settled {prescreen_results.num_rows} features; scanning {test_numeric + test_categorical}",
+              file=sys.stderr)
+
+    if args.backfill_by:
+        results = backfill_drift(profile, current if not args.sequential else current.to_table(), args.backfill_by,
+                                 numeric_cols, categorical_cols, alpha=args.alpha, chunk_days=args.chunk_days,
+                                 checkpoint_dir=args.checkpoint_dir)
+    elif args.incremental_state:
+        state = load_incremental_state(profile, numeric_cols, categorical_cols, path=args.incremental_state)
+        results, state = incremental_drift(profile, args.current, numeric_cols, categorical_cols, state, args.alpha)
+        save_incremental_state(state, path=args.incremental_state)
+    elif not test_numeric and not test_categorical:
+        results = prescreen_results
+    elif args.sequential:
+        results, rows_read = sequential_drift_tests(profile, iter_batches(current, test_numeric + test_categorical),
+                                                    test_numeric, test_categorical, current.count_rows(), args.alpha,
+                                                    args.delta, run_id=run_id, window_start=window_start)
+        print(f"Rows read per feature (of {current.count_rows()}): {rows_read.to_dict()}", file=sys.stderr)
+    else:
+        results = run_drift_tests(profile, current, test_numeric, test_categorical, args.alpha, args.executor,
+                                  args.workers, args.max_categories, args.numeric_kernel, run_id=run_id,
+                                  window_start=window_start, metrics=_split_columns(args.metrics) or ())
+    if prescreen_results is not None and results is not prescreen_results:
+        results = concat_results(prescreen_results, results)
+    if segment_by:
+        segment_results = segment_drift_tests(profile, current if not args.sequential else current.to_table(),
+                                              numeric_cols, categorical_cols, segment_by, args.alpha,
+                                              run_id=results.column("run_id")[0].as_py(),
+                                              window_start=results.column("window_start")[0].as_py())
+        results = concat_results(results, segment_results)
+    if args.multivariate:
+        if baseline is None:
+            baseline = read_table(args.baseline, numeric_cols + categorical_cols)
+        batched = args.sequential or args.incremental_state   # current is a lazily scanned dataset
+        multivariate_results = multivariate_drift_tests(
+            baseline, iter_batches(current, numeric_cols + categorical_cols) if batched else current,
+            numeric_cols, categorical_cols, args.multivariate, args.alpha,
+            run_id=results.column("run_id")[0].as_py(), window_start=results.column("window_start")[0].as_py())
+        results = concat_results(results, multivariate_results)
+    if args.ood_output:
+        rows = current if isinstance(current, pa.Table) else current.to_table()
+        write_table(add_ood_score(profile, rows, numeric_cols, categorical_cols), args.ood_output)
+    results_df = results_frame(results)
+    if args.output:
+        write_table(results, args.output)
+    else:
+        results_df.to_string(sys.stdout, index=False)
+        print()
+
+    drift = drift_detected(results_df)
+    if drift and args.retrain_model:
+        auc = retrain_model(args.retrain_model)
+        print(f"New model trained, logged, and registered with AUC={auc:.4f}")
+    return 1 if drift and args.fail_on_drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Two-sample drift statistics: PSI for numeric features, chi-square for categorical ones."""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def population_stability_index(expected, actual, buckets=10, breakpoints=None):
+    # breakpoints: precomputed baseline quantiles (e.g. from cache.BreakpointCache)
+    if breakpoints is None:
+        breakpoints = np.percentile(expected, np.linspace(0, 100, buckets + 1))
+    expected_percents = np.histogram(expected, bins=breakpoints)[0] / len(expected)
+    actual_percents = np.histogram(actual, bins=breakpoints)[0] / len(actual)
+    psi = np.sum((expected_percents - actual_percents) * np.log((expected_percents + 1e-6) / (actual_percents + 1e-6)))
+    return psi
+
+
+def _searchsorted_columns(sorted_values, edges, side="left"):
+    # np.searchsorted applied to every column at once: bisect all (edge, column) pairs in lockstep
+    n, m = sorted_values.shape
+    cols = np.arange(m)
+    lo = np.zeros(edges.shape, dtype=np.intp)
+    hi = np.full(edges.shape, n, dtype=np.intp)
+    active = lo < hi
+    while active.any():
+        mid = (lo + hi) // 2
+        probe = sorted_values[np.minimum(mid, n - 1), cols]
+        go_right = (probe < edges) if side == "left" else (probe <= edges)
+        lo = np.where(active & go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+        active = lo < hi
+    return lo
+
+
+def _bin_counts_columns(sorted_values, breakpoints):
+    # Same bin semantics as np.histogram: [b_i, b_i+1) for every bin except the last, which is closed
+    cum_counts = np.concatenate([
+        _searchsorted_columns(sorted_values, breakpoints[:-1], side="left"),
+        _searchsorted_columns(sorted_values, breakpoints[-1:], side="right"),
+    ])
+    return np.diff(cum_counts, axis=0)
+
+
+def population_stability_index_batch(expected, actual, buckets=10, breakpoints=None):
+    """Column-wise population_stability_index for 2-D (rows x features) inputs; returns one PSI per column.
+
+    breakpoints: optional precomputed (buckets + 1) x features baseline quantiles.
+    """
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.ndim == 1:
+        expected, actual = expected[:, None], actual[:, None]
+    expected_sorted = np.sort(expected, axis=0)
+    actual_sorted = np.sort(actual, axis=0)
+    if breakpoints is None:
+        breakpoints = np.percentile(expected_sorted, np.linspace(0, 100, buckets + 1), axis=0)
+    breakpoints = np.asarray(breakpoints, dtype=float).reshape(buckets + 1, -1)
+    expected_percents = _bin_counts_columns(expected_sorted, breakpoints) / len(expected)
+    actual_percents = _bin_counts_columns(actual_sorted, breakpoints) / len(actual)
+    return _psi_from_percents(expected_percents, actual_percents)
+
+
+def numeric_drift_kernel(expected, actual, buckets=10, quantiles=(5, 25, 50, 75, 95), expected_sorted=False):
+    """KS, PSI, Wasserstein distance and summary quantiles for every column from one sort per sample.
+
+    expected/actual are (rows x features); pass expected_sorted=True when expected is already sorted
+    column-wise (e.g. a baseline profile's exact sample). PSI and the quantiles are identical to
+    population_stability_index / np.percentile, the KS statistic and Wasserstein distance to
+    stats.ks_2samp / stats.wasserstein_distance; the KS p-value is the asymptotic one
+    (ks_2samp method="asymp"). Returns a dict of per-column arrays.
+    """
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.ndim == 1:
+        expected, actual = expected[:, None], actual[:, None]
+    # Work feature-major (features x rows, C-contiguous) so every sort/scan runs along contiguous memory.
+    # np.sort copies: column-major inputs (e.g. numeric_matrix, pandas blocks) transpose to views of the
+    # caller's (possibly read-only) arrays, which must not be sorted in place
+    expected_rows = np.ascontiguousarray(expected.T) if expected_sorted else np.sort(expected.T, axis=1)
+    actual_rows = np.sort(actual.T, axis=1)
+    n_exp, n_act = expected_rows.shape[1], actual_rows.shape[1]
+
+    # Breakpoints and summary quantiles: selection on already-sorted buffers is linear time
+    percents = np.concatenate([np.linspace(0, 100, buckets + 1), quantiles])
+    expected_percentiles = np.percentile(expected_rows, percents, axis=1)
+    breakpoints = expected_percentiles[:buckets + 1]
+    expected_bin_counts = _bin_counts_columns(expected_rows.T, breakpoints)
+    actual_bin_counts = _bin_counts_columns(actual_rows.T, breakpoints)
+    psi = _psi_from_percents(expected_bin_counts / n_exp, actual_bin_counts / n_act)
+
+    # Merge the two sorted runs (a stable sort of two runs is a linear merge) and walk both ECDFs
+    combined = np.concatenate([expected_rows, actual_rows], axis=1)
+    order = np.argsort(combined, axis=1, kind="stable")
+    merged = np.take_along_axis(combined, order, axis=1)
+    cum_exp = np.cumsum(order < n_exp, axis=1)
+    abs_cdf_diff = cum_exp / n_exp
+    abs_cdf_diff -= (np.arange(1, n_exp + n_act + 1) - cum_exp) / n_act
+    np.abs(abs_cdf_diff, out=abs_cdf_diff)
+    gaps = np.diff(merged, axis=1)
+    # The ECDFs only jump after the last of a run of tied values
+    run_ends = np.hstack([gaps != 0, np.ones((len(merged), 1), dtype=bool)])
+    ks_stat = np.max(abs_cdf_diff, axis=1, where=run_ends, initial=0.0)
+    wasserstein = np.sum(abs_cdf_diff[:, :-1] * gaps, axis=1)
+    ks_pvalue = stats.kstwo.sf(ks_stat, np.round(n_exp * n_act / (n_exp + n_act)))
+
+    return {
+        "breakpoints": breakpoints,
+        "expected_bin_counts": expected_bin_counts,
+        "actual_bin_counts": actual_bin_counts,
+        "psi": psi,
+        "ks_stat": ks_stat,
+        "ks_pvalue": ks_pvalue,
+        "wasserstein": wasserstein,
+        "expected_quantiles": expected_percentiles[buckets + 1:],
+        "actual_quantiles": np.percentile(actual_rows, quantiles, axis=1),
+    }
+
+
+def _psi_from_percents(expected_percents, actual_percents):
+    # Reduce over contiguous rows so the summation order matches the 1-D function exactly
+    terms = (expected_percents - actual_percents) * np.log((expected_percents + 1e-6) / (actual_percents + 1e-6))
+    return np.ascontiguousarray(terms.T).sum(axis=1)
+
+
+def chi_square_test(expected, actual, max_categories=None):
+    return _chi_square_from_counts(expected.value_counts(), actual.value_counts(), max_categories)
+
+
+def chi_square_test_high_cardinality(expected, actual, max_categories=None):
+    # Factorize both windows against one shared codebook and count codes with np.bincount, so no
+    # per-category Python objects are built; categories beyond max_categories collapse into "other"
+    expected, actual = pd.Series(expected), pd.Series(actual)
+    codes, uniques = pd.factorize(pd.concat([expected, actual], ignore_index=True))
+    exp_codes, act_codes = codes[:len(expected)], codes[len(expected):]
+    exp_counts = np.bincount(exp_codes[exp_codes >= 0], minlength=len(uniques))
+    act_counts = np.bincount(act_codes[act_codes >= 0], minlength=len(uniques))
+    return chi_square_statistic(*collapse_long_tail(exp_counts, act_counts, max_categories))
+
+
+def _align_category_counts(exp_counts, act_counts):
+    # Align two value_counts Series on a shared codebook (one hash pass over both category indexes)
+    codes, uniques = pd.factorize(exp_counts.index.append(act_counts.index))
+    exp_aligned = np.bincount(codes[:len(exp_counts)], weights=exp_counts.to_numpy(dtype=float), minlength=len(uniques))
+    act_aligned = np.bincount(codes[len(exp_counts):], weights=act_counts.to_numpy(dtype=float), minlength=len(uniques))
+    return exp_aligned, act_aligned
+
+
+def _chi_square_from_counts(exp_counts, act_counts, max_categories=None):
+    return chi_square_statistic(*collapse_long_tail(*_align_category_counts(exp_counts, act_counts), max_categories))
+
+
+def collapse_long_tail(exp_counts, act_counts, max_categories=None):
+    # Keep the max_categories - 1 most frequent categories (both windows combined), sum the rest into "other"
+    if max_categories is None or len(exp_counts) <= max_categories:
+        return exp_counts, act_counts
+    keep = np.zeros(len(exp_counts), dtype=bool)
+    keep[np.argpartition(-(exp_counts + act_counts), max_categories - 2)[:max_categories - 1]] = True
+    return (np.append(exp_counts[keep], exp_counts[~keep].sum()),
+            np.append(act_counts[keep], act_counts[~keep].sum()))
+
+
+def chi_square_statistic(exp_counts, act_counts):
+    """Chi-square test of homogeneity for a 2 x K table in closed form.
+
+    Same result as stats.chi2_contingency([exp_counts, act_counts]), including its Yates correction
+    when K == 2, in O(K) vectorized work.
+    """
+    exp_counts, act_counts = np.asarray(exp_counts, dtype=float), np.asarray(act_counts, dtype=float)
+    n_exp, n_act = exp_counts.sum(), act_counts.sum()
+    col_totals = exp_counts + act_counts
+    dof = len(col_totals) - 1
+    if dof == 0:
+        return 0.0, 1.0
+    if dof == 1:
+        observed = np.vstack([exp_counts, act_counts])
+        expected = np.outer([n_exp, n_act], col_totals) / (n_exp + n_act)
+        diff = expected - observed
+        observed = observed + np.minimum(0.5, np.abs(diff)) * np.sign(diff)
+        chi2 = np.sum((observed - expected) ** 2 / expected)
+    else:
+        # sum over cells of (O - E)^2 / E collapses to sum_k (a_k N_b - b_k N_a)^2 / (N_a N_b t_k)
+        chi2 = np.sum((exp_counts * n_act - act_counts * n_exp) ** 2 / col_totals) / (n_exp * n_act)
+    return chi2, stats.chi2.sf(chi2, dof)
+
+
+def chi_square_statistic_batch(exp_counts, act_counts):
+    """chi_square_statistic for many 2 x K tables at once (rows of act_counts, e.g. segments).
+
+    exp_counts is (K,) or (tables x K); categories with a zero total in a table are left out of that
+    table, as chi2_contingency would require. Returns (chi2, p-value) arrays, Yates-corrected where a
+    table has two categories.
+    """
+    act_counts = np.asarray(act_counts, dtype=float)
+    exp_counts = np.broadcast_to(np.asarray(exp_counts, dtype=float), act_counts.shape)
+    n_exp, n_act = exp_counts.sum(axis=1), act_counts.sum(axis=1)
+    col_totals = exp_counts + act_counts
+    present = col_totals > 0
+    dof = present.sum(axis=1) - 1
+    n_exp_, n_act_ = n_exp[:, None], n_act[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross = exp_counts * n_act_ - act_counts * n_exp_
+        chi2 = np.sum(np.divide(cross ** 2, col_totals, out=np.zeros_like(col_totals), where=present), axis=1)
+        chi2 /= n_exp * n_act
+        # 2 x 2 tables: |O - E| is the same in every cell, |a_k N_b - b_k N_a| / N for either category
+        total = n_exp + n_act
+        diff = np.abs(cross[np.arange(len(cross)), np.argmax(present, axis=1)]) / total
+        yates = ((diff - np.minimum(0.5, diff)) ** 2 * total ** 3
+                 / (n_exp * n_act * np.prod(col_totals, axis=1, where=present)))
+    chi2 = np.where(dof == 1, yates, chi2)
+    chi2 = np.where(dof <= 0, 0.0, chi2)
+    return chi2, np.where(dof <= 0, 1.0, stats.chi2.sf(chi2, np.maximum(dof, 1)))
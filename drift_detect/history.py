@@ -0,0 +1,99 @@
+"""Append-only drift history: results merged into a Delta table partitioned by run date.
+
+Rows are keyed on (run_id, feature, segment, metric_name), so re-running a batch or replaying a stream micro-batch
+updates its rows instead of duplicating them. Hourly runs leave many small files behind;
+compact_drift_history bin-packs recent partitions and Z-orders them by feature so per-feature trend
+queries over months of history touch a handful of files.
+
+Tables in the earlier summary layout (feature, type, test_result, effect_size, drift_flag as strings,
+unpartitioned, overwritten each run) cannot take the MERGE: the first write renames such a table to
+<table>_legacy and starts the history table in its place. History tables from before a result column
+existed (e.g. segment) get it added, null for the old rows.
+"""
+import pandas as pd
+
+from .arrow import arrow_to_spark
+from .results import RESULT_SCHEMA
+
+HISTORY_PARTITION = "run_date"
+HISTORY_KEY = ("run_id", "feature", "segment", "metric_name")
+LEGACY_SUFFIX = "_legacy"
+
+
+def _history_frame(results, spark):
+    from pyspark.sql import functions as F
+
+    return arrow_to_spark(spark, results, RESULT_SCHEMA).withColumn(HISTORY_PARTITION, F.to_date("window_start"))
+
+
+def _migrate_legacy_history(table, spark):
+    # Rename a summary-layout table (no run date partition) aside, or add the result columns an older history
+    # table lacks; True when table is now a history table
+    if not spark.catalog.tableExists(table):
+        return False
+    columns = set(spark.table(table).columns)
+    if HISTORY_PARTITION in columns:
+        missing = [field for field in RESULT_SCHEMA.split(", ") if field.split(" ")[0] not in columns]
+        if missing:
+            spark.sql(f"ALTER TABLE {table} ADD COLUMNS ({', '.join(missing)})")
+        return True
+    legacy = f"{table}{LEGACY_SUFFIX}"
+    if spark.catalog.tableExists(legacy):
+        raise ValueError(f"{table} has the pre-history summary layout and {legacy} already exists; "
+                         f"drop or rename one of them before writing drift history")
+    spark.sql(f"ALTER TABLE {table} RENAME TO {legacy}")
+    return False
+
+
+def write_drift_history(results, table, spark=None):
+    # results: Arrow table with results.RESULT_ARROW_SCHEMA; creates the table on first use
+    from .spark_backend import get_spark
+
+    spark = get_spark(spark)
+    migrated = _migrate_legacy_history(table, spark)
+    updates = _history_frame(results, spark)
+    if not migrated:
+        updates.write.format("delta").partitionBy(HISTORY_PARTITION).saveAsTable(table)
+        spark.sql(f"ALTER TABLE {table} SET TBLPROPERTIES ('delta.autoOptimize.optimizeWrite' = 'true')")
+        return
+
+    view = "drift_history_updates"
+    updates.createOrReplaceTempView(view)
+    # The partition column in the join condition lets MERGE prune to the dates being written
+    on = " AND ".join(f"t.{col} <=> s.{col}" for col in (HISTORY_PARTITION, *HISTORY_KEY))   # null-safe: segment
+    spark.sql(f"""
+        MERGE INTO {table} t
+        USING {view} s
+        ON {on}
+        WHEN MATCHED THEN UPDATE SET *
+        WHEN NOT MATCHED THEN INSERT *
+    """)
+    spark.catalog.dropTempView(view)
+
+
+def drift_frequency(table, days=90, spark=None):
+    # Share of whole-window runs in the last `days` that flagged each feature, as a pandas Series (trigger priority);
+    # read-only, so a missing or not yet migrated table reads as empty (write_drift_history migrates it)
+    from .spark_backend import get_spark
+
+    spark = get_spark(spark)
+    if not spark.catalog.tableExists(table):
+        return pd.Series(dtype=float)
+    if not {HISTORY_PARTITION, "segment", "feature", "drift_flag"} <= set(spark.table(table).columns):
+        return pd.Series(dtype=float)
+    rows = spark.sql(f"""
+        SELECT feature, avg(CAST(drift_flag AS DOUBLE)) AS drift_rate
+        FROM {table}
+        WHERE {HISTORY_PARTITION} >= date_sub(current_date(), {int(days)}) AND segment IS NULL
+        GROUP BY feature
+    """).collect()
+    return pd.Series({row["feature"]: row["drift_rate"] for row in rows}, dtype=float)
+
+
+def compact_drift_history(table, days=None, zorder_by=("feature",), spark=None):
+    # OPTIMIZE the last `days` run-date partitions (all of them when None), clustering files by zorder_by
+    from .spark_backend import get_spark
+
+    where = f" WHERE {HISTORY_PARTITION} >= date_sub(current_date(), {int(days)})" if days is not None else ""
+    zorder = f" ZORDER BY ({', '.join(zorder_by)})" if zorder_by else ""
+    return get_spark(spark).sql(f"OPTIMIZE {table}{where}{zorder}")
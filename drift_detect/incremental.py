@@ -0,0 +1,173 @@
+"""Incremental drift over a Delta table: each run reads only the rows changed since the last processed version.
+
+Running bin / category counts (the streaming module's state, plus the last processed table version) are
+kept between runs. A run reads what changed between that version and the latest one:
+
+* with change data feed (delta.enableChangeDataFeed), the change rows: inserts and update post-images are
+  added to the counts, deletes and update pre-images subtracted;
+* otherwise, locally, the version-diffed file lists: rows of files added since the last version are added,
+  rows of files removed since then subtracted. On Spark, a table without change data feed (or whose feed
+  does not reach back to the last version) is recounted in full.
+
+The counts therefore always describe the whole table at the new version, at a cost proportional to the
+changed rows. Appending each new window (optionally deleting expired rows) keeps runs cheap; overwriting the
+table changes every row. PSI / chi-square against the baseline profile are recomputed from the counts
+(streaming.stream_drift_results), with run_id "incremental-<version>", so re-running an unchanged version
+updates its history rows. The first run counts the current snapshot. Delete the state when the baseline
+profile is rebuilt.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .segments import segment_counts, spark_segment_counts
+from .streaming import _empty_stream_counts, _load_stream_counts, _stream_state_rows, init_stream_state, stream_drift_results
+
+INCREMENTAL_STATE_SCHEMA = (
+    "feature STRING, type STRING, last_version LONG, row_count LONG, bin_counts ARRAY<DOUBLE>, "
+    "categories ARRAY<STRING>, category_counts ARRAY<LONG>"
+)
+
+_SIGN_COL = "__sign"
+_CHANGE_SIGNS = {"insert": 1, "update_postimage": 1, "delete": -1, "update_preimage": -1}
+
+
+def load_incremental_state(profile, numeric_cols, categorical_cols, table=None, path=None, spark=None):
+    # Saved running counts (Delta table, or local Parquet at path), or empty counts before the first run
+    state = init_stream_state(profile, numeric_cols, categorical_cols)
+    state["last_version"] = -1
+    if path is not None:
+        stored = pd.read_parquet(path) if Path(path).exists() else None
+    elif table is not None:
+        from .spark_backend import get_spark
+
+        spark = get_spark(spark)
+        stored = spark.table(table).toPandas() if spark.catalog.tableExists(table) else None
+    else:
+        stored = None
+    if stored is not None and len(stored):
+        stored = stored.set_index("feature")
+        if set(stored.index) != set(state["numeric_cols"]) | set(state["categorical_cols"]):
+            raise ValueError("incremental state was saved for different features; delete it to start over")
+        state["last_version"] = int(stored["last_version"].max())
+        _load_stream_counts(state, stored)
+    return state
+
+
+def save_incremental_state(state, table=None, path=None, spark=None):
+    rows = _stream_state_rows(state, state["last_version"])
+    if path is not None:
+        columns = [field.split(" ")[0] for field in INCREMENTAL_STATE_SCHEMA.split(", ")]
+        pd.DataFrame.from_records(rows, columns=columns).to_parquet(path, index=False)
+    else:
+        from .spark_backend import get_spark
+
+        get_spark(spark).createDataFrame(rows, schema=INCREMENTAL_STATE_SCHEMA).write.mode("overwrite").saveAsTable(table)
+
+
+def fold_changes(state, counts):
+    """Add the signed per-sign counts (segment_counts keyed on the sign column) to the running counts."""
+    if not len(counts["segments"]):
+        return state
+    signs = counts["keys"][_SIGN_COL].to_numpy(dtype=float)
+    net_rows = signs @ counts["rows"]
+    if state["numeric_cols"]:
+        state["row_counts"] += net_rows
+        state["bin_counts"] += np.tensordot(signs, counts["bin_counts"], axes=1)
+    for j, table in enumerate(counts["category_counts"]):
+        net = pd.Series(signs @ table.to_numpy(dtype=float), index=table.columns.astype(str))
+        running = state["category_counts"][j].add(net, fill_value=0).round().astype("int64")
+        state["category_counts"][j] = running[running != 0]
+    return state
+
+
+def delta_changes(path, since_version, columns):
+    """(changed rows with a +1 / -1 sign column, latest version) of a local Delta table since since_version."""
+    from deltalake import DeltaTable   # optional dependency: pip install drift-detect[delta]
+
+    table = DeltaTable(str(path))
+    version = table.version()
+    if since_version >= version:
+        return None, version
+    if since_version < 0:
+        snapshot = table.to_pyarrow_table(columns=columns)
+        return snapshot.append_column(_SIGN_COL, pa.repeat(pa.scalar(1, pa.int8()), snapshot.num_rows)), version
+    if table.metadata().configuration.get("delta.enableChangeDataFeed") == "true":
+        feed = pa.table(table.load_cdf(starting_version=since_version + 1, ending_version=version,
+                                       columns=[*columns, "_change_type"]))
+        change_types = pc.cast(feed.column("_change_type"), pa.string()).to_numpy(zero_copy_only=False)
+        signs = pd.Series(change_types).map(_CHANGE_SIGNS).to_numpy(dtype=np.int8)
+        return feed.select(columns).append_column(_SIGN_COL, pa.array(signs)), version
+    before, after = set(DeltaTable(str(path), version=since_version).file_uris()), set(table.file_uris())
+    parts = []
+    for files, sign in ((after - before, 1), (before - after, -1)):
+        if files:
+            rows = pq.read_table(sorted(files), columns=columns)
+            parts.append(rows.append_column(_SIGN_COL, pa.repeat(pa.scalar(sign, pa.int8()), rows.num_rows)))
+    # Files from different writers may use different string layouts
+    return (pa.concat_tables([part.cast(parts[0].schema) for part in parts]) if parts else None), version
+
+
+def incremental_drift(profile, path, numeric_cols, categorical_cols, state=None, alpha=0.05):
+    """(results, state) after folding the changes of a local Delta table into state (new counts when None)."""
+    if state is None:
+        state = load_incremental_state(profile, numeric_cols, categorical_cols)
+    changes, version = delta_changes(path, state["last_version"], [*numeric_cols, *categorical_cols])
+    if changes is not None and changes.num_rows:
+        breakpoints = state["breakpoints"] if numeric_cols else np.zeros((2, 0))
+        fold_changes(state, segment_counts(changes, [_SIGN_COL], numeric_cols, breakpoints, categorical_cols))
+    state["last_version"] = version
+    return stream_drift_results(state, profile, alpha, run_id=f"incremental-{version}"), state
+
+
+def spark_incremental_drift(profile, table, numeric_cols, categorical_cols, state_table, alpha=0.05, output_table=None,
+                            spark=None):
+    """incremental_drift for a metastore Delta table: one groupBy job over the change feed rows.
+
+    State is kept in state_table; with output_table, results are merged into that history table.
+    """
+    from py4j.protocol import Py4JJavaError
+    from pyspark.errors import PySparkException
+    from pyspark.sql import functions as F
+
+    from .cache import table_version
+    from .spark_backend import get_spark
+
+    spark = get_spark(spark)
+    state = load_incremental_state(profile, numeric_cols, categorical_cols, table=state_table, spark=spark)
+    since, version = state["last_version"], table_version(table, spark)
+    columns = [*numeric_cols, *categorical_cols]
+    breakpoints = state["breakpoints"] if numeric_cols else np.zeros((2, 0))
+    if since < version:
+        properties = spark.sql(f"DESCRIBE DETAIL {table}").first()["properties"] or {}
+        counts = None
+        if since >= 0 and properties.get("delta.enableChangeDataFeed") == "true":
+            change_type = F.col("_change_type")
+            sign = (F.when(change_type.isin("insert", "update_postimage"), 1)
+                    .when(change_type.isin("delete", "update_preimage"), -1))
+            try:
+                feed = (spark.read.option("readChangeFeed", "true").option("startingVersion", since + 1)
+                        .option("endingVersion", version).table(table)
+                        .select(*columns, sign.alias(_SIGN_COL)))
+                counts = spark_segment_counts(feed, [_SIGN_COL], numeric_cols, breakpoints, categorical_cols)
+            # Feed enabled after since (analysis error), or its files vacuumed / expired (SparkException at execution)
+            except (PySparkException, Py4JJavaError):
+                counts = None
+        if counts is None:
+            _empty_stream_counts(state)   # recount the snapshot
+            snapshot = spark.read.option("versionAsOf", version).table(table).select(*columns, F.lit(1).alias(_SIGN_COL))
+            counts = spark_segment_counts(snapshot, [_SIGN_COL], numeric_cols, breakpoints, categorical_cols)
+        fold_changes(state, counts)
+        state["last_version"] = version
+        save_incremental_state(state, table=state_table, spark=spark)
+
+    results = stream_drift_results(state, profile, alpha, run_id=f"incremental-{version}")
+    if output_table is not None:
+        from .history import write_drift_history
+
+        write_drift_history(results, output_table, spark)
+    return results
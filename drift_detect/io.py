@@ -0,0 +1,47 @@
+"""Local table I/O for running drift checks without a Databricks runtime (Parquet, CSV, Delta)."""
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
+import pyarrow.parquet as pq
+
+
+def read_table(path, columns=None):
+    # Returns a pyarrow Table with only the requested feature columns
+    path = Path(path)
+    if (path / "_delta_log").is_dir():
+        from deltalake import DeltaTable   # optional dependency: pip install drift-detect[delta]
+
+        return DeltaTable(str(path)).to_pyarrow_table(columns=columns)
+    if path.suffix == ".csv":
+        return pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(include_columns=columns or []))
+    return pq.read_table(path, columns=columns)
+
+
+def open_dataset(path):
+    # Lazily scanned pyarrow Dataset over the same formats as read_table
+    path = Path(path)
+    if (path / "_delta_log").is_dir():
+        from deltalake import DeltaTable
+
+        return DeltaTable(str(path)).to_pyarrow_dataset()
+    return pa_ds.dataset(path, format="csv" if path.suffix == ".csv" else "parquet")
+
+
+def iter_batches(dataset, columns, batch_rows=65_536, seed=0):
+    # Record batches file by file in a shuffled file order, so an early stop reads only the files it needs
+    fragments = list(dataset.get_fragments())
+    for k in np.random.default_rng(seed).permutation(len(fragments)):
+        yield from fragments[k].to_batches(columns=columns, batch_size=batch_rows)
+
+
+def write_table(table, path):
+    if not isinstance(table, pa.Table):
+        table = pa.Table.from_pandas(table, preserve_index=False)
+    path = Path(path)
+    if path.suffix == ".csv":
+        pa_csv.write_csv(table, path)
+    else:
+        pq.write_table(table, path)
@@ -0,0 +1,75 @@
+"""Divergence metrics computed from bin / category counts that the drift tests already hold.
+
+Every metric maps (expected_shares, actual_shares), both (bins x features), to one value per feature.
+divergence_metrics evaluates any subset of them for every feature in one vectorized step. Features
+with different bin or category counts are zero-padded to a common height; empty bins contribute
+nothing to any metric. Register more metrics with register_divergence.
+"""
+import numpy as np
+
+from .functions import _psi_from_percents
+
+DIVERGENCE_METRICS = {}
+_EPS = 1e-6   # same smoothing as PSI
+
+
+def register_divergence(name):
+    def register(fn):
+        DIVERGENCE_METRICS[name] = fn
+        return fn
+    return register
+
+
+@register_divergence("psi")
+def _psi(p, q):
+    return _psi_from_percents(p, q)
+
+
+@register_divergence("kl")
+def _kl(p, q):
+    # KL(expected || actual)
+    return np.sum(p * np.log((p + _EPS) / (q + _EPS)), axis=0)
+
+
+@register_divergence("js")
+def _js(p, q):
+    # Jensen-Shannon divergence, base 2 (0 = identical, 1 = disjoint)
+    m = (p + q) / 2
+    return (np.sum(p * np.log2((p + _EPS) / (m + _EPS)), axis=0) + np.sum(q * np.log2((q + _EPS) / (m + _EPS)), axis=0)) / 2
+
+
+@register_divergence("hellinger")
+def _hellinger(p, q):
+    return np.sqrt(np.maximum(0.5 * np.sum((np.sqrt(p) - np.sqrt(q)) ** 2, axis=0), 0.0))
+
+
+@register_divergence("tv")
+def _total_variation(p, q):
+    return 0.5 * np.sum(np.abs(p - q), axis=0)
+
+
+def _stack_counts(counts):
+    # (bins x features) array, or a list of per-feature 1-D counts of varying length (zero-padded)
+    if isinstance(counts, np.ndarray) and counts.ndim == 2:
+        return counts.astype(float)
+    height = max((len(c) for c in counts), default=0)
+    stacked = np.zeros((height, len(counts)))
+    for j, c in enumerate(counts):
+        stacked[:len(c), j] = c
+    return stacked
+
+
+def divergence_metrics(expected_counts, actual_counts, metrics=None, expected_totals=None, actual_totals=None):
+    """{metric: per-feature values} for the selected metrics (all registered ones when None).
+
+    Shares are counts over the totals (column sums by default). Pass the row counts as totals to match
+    PSI's normalisation when values can fall outside the bins.
+    """
+    expected, actual = _stack_counts(expected_counts), _stack_counts(actual_counts)
+    expected_totals = expected.sum(axis=0) if expected_totals is None else np.asarray(expected_totals, dtype=float)
+    actual_totals = actual.sum(axis=0) if actual_totals is None else np.asarray(actual_totals, dtype=float)
+    p, q = expected / expected_totals, actual / actual_totals
+    unknown = [name for name in metrics or () if name not in DIVERGENCE_METRICS]
+    if unknown:
+        raise ValueError(f"unknown divergence metrics {unknown}; registered: {sorted(DIVERGENCE_METRICS)}")
+    return {name: DIVERGENCE_METRICS[name](p, q) for name in (DIVERGENCE_METRICS if metrics is None else metrics)}
@@ -0,0 +1,245 @@
+"""Multivariate drift: joint-distribution tests over the numeric and encoded categorical features.
+
+Per-column tests miss shifts in how features move together. Both tests here run in time linear in the number
+of rows and use bounded memory:
+
+* rff_mmd_test maps every row to random Fourier features of a Gaussian kernel. The row mappings are
+  accumulated batch by batch into per-table sums of the features and of their outer products. The squared
+  distance between the two mean embeddings approximates MMD^2. A Hotelling T^2 test on the same moments
+  gives the p-value. The moments merge by addition, so on Spark every partition reduces to one row.
+* domain_classifier_auc trains a gradient-boosted classifier to tell a uniform subsample of the baseline
+  from one of the current window and scores it by held-out AUC (0.5 = indistinguishable). The p-value
+  comes from the Mann-Whitney normal approximation.
+
+Features are encoded once against the baseline. Numeric columns are standardised by the baseline mean and
+standard deviation, with nulls imputed at the mean. Each categorical column is one-hot encoded over its
+max_categories most frequent baseline categories plus an "other" slot.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import stats
+
+from .arrow import numeric_matrix
+from .results import DriftResults
+
+MULTIVARIATE_FEATURE = "__multivariate__"   # feature name of multivariate rows in the results table
+
+
+def build_encoder(baseline, numeric_cols, categorical_cols, max_categories=20):
+    # Encoding parameters from a pandas DataFrame or pyarrow Table holding (a sample of) the baseline
+    values = numeric_matrix(baseline, numeric_cols)
+    categories = {}
+    for col in categorical_cols:
+        series = baseline.column(col).to_pandas() if isinstance(baseline, pa.Table) else baseline[col]
+        categories[col] = series.dropna().astype(str).value_counts().index[:max_categories].tolist()
+    return _encoder(numeric_cols, np.nanmean(values, axis=0), np.nanstd(values, axis=0), categories)
+
+
+def spark_build_encoder(sdf, numeric_cols, categorical_cols, max_categories=20):
+    # Same parameters as build_encoder from one aggregation plus one category-count job
+    from pyspark.sql import functions as F
+
+    from .spark_backend import spark_category_counts
+
+    moments = sdf.agg(*[F.mean(c).alias(f"m{j}") for j, c in enumerate(numeric_cols)],
+                      *[F.stddev_pop(c).alias(f"s{j}") for j, c in enumerate(numeric_cols)]).first() if numeric_cols else {}
+    counts = spark_category_counts(sdf, categorical_cols) if categorical_cols else []
+    categories = {col: c.sort_values(ascending=False).index[:max_categories].tolist() for col, c in zip(categorical_cols, counts)}
+    mean = np.array([moments[f"m{j}"] for j in range(len(numeric_cols))], dtype=float)
+    std = np.array([moments[f"s{j}"] for j in range(len(numeric_cols))], dtype=float)
+    return _encoder(numeric_cols, mean, std, categories)
+
+
+def _encoder(numeric_cols, mean, std, categories):
+    std = np.where(np.isfinite(std) & (std > 0), std, 1.0)   # constant columns stay at zero
+    width = len(numeric_cols) + sum(len(c) + 1 for c in categories.values())
+    return {"numeric_cols": list(numeric_cols), "mean": np.nan_to_num(mean), "std": std,
+            "categories": categories, "width": width}
+
+
+def encode_features(data, encoder):
+    # (rows x encoder["width"]) float64 design matrix for a pandas DataFrame or pyarrow Table
+    n_numeric = len(encoder["numeric_cols"])
+    X = np.zeros((len(data), encoder["width"]))
+    X[:, :n_numeric] = np.nan_to_num((numeric_matrix(data, encoder["numeric_cols"]) - encoder["mean"]) / encoder["std"])
+    offset = n_numeric
+    for col, categories in encoder["categories"].items():
+        series = data.column(col).to_pandas() if isinstance(data, pa.Table) else data[col]
+        codes = pd.Index(categories).get_indexer(series.astype(str))
+        codes[codes < 0] = len(categories)   # unseen categories and nulls share the "other" slot
+        X[np.arange(len(data)), offset + codes] = 1.0
+        offset += len(categories) + 1
+    return X
+
+
+def _chunks(data, batch_rows):
+    # A DataFrame or Table is sliced into batches; any other iterable is taken to yield chunks already
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), batch_rows):
+            yield data.iloc[start:start + batch_rows]
+    elif isinstance(data, pa.Table):
+        for start in range(0, data.num_rows, batch_rows):
+            yield data.slice(start, batch_rows)
+    else:
+        for chunk in data:
+            yield pa.Table.from_batches([chunk]) if isinstance(chunk, pa.RecordBatch) else chunk
+
+
+def median_bandwidth(X, max_rows=1000, seed=0):
+    # Median pairwise distance of (a subsample of) the encoded baseline: the usual Gaussian kernel width
+    rng = np.random.default_rng(seed)
+    if len(X) > max_rows:
+        X = X[rng.choice(len(X), max_rows, replace=False)]
+    sq = np.sum(X ** 2, axis=1)
+    distances = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2 * X @ X.T, 0))
+    median = np.median(distances[np.triu_indices(len(X), k=1)]) if len(X) > 1 else 0.0
+    return median if median > 0 else 1.0
+
+
+def rff_frequencies(width, n_frequencies=64, bandwidth=1.0, seed=0):
+    return np.random.default_rng(seed).normal(scale=1.0 / bandwidth, size=(width, n_frequencies))
+
+
+def rff_moments(chunks, encoder, frequencies):
+    # (rows, sum of features, sum of feature outer products) over an iterable of chunks; memory is one chunk
+    n_features = 2 * frequencies.shape[1]
+    n, s, ss = 0, np.zeros(n_features), np.zeros((n_features, n_features))
+    for chunk in chunks:
+        projected = encode_features(chunk, encoder) @ frequencies
+        Z = np.hstack([np.cos(projected), np.sin(projected)]) / np.sqrt(frequencies.shape[1])
+        n, s, ss = n + len(Z), s + Z.sum(axis=0), ss + Z.T @ Z
+    return n, s, ss
+
+
+def mmd_from_moments(baseline_moments, current_moments, rcond=1e-6):
+    """(RFF estimate of MMD^2, Hotelling T^2 p-value) from the two tables' rff_moments."""
+    (n, s_x, ss_x), (m, s_y, ss_y) = baseline_moments, current_moments
+    if n < 2 or m < 2:
+        return np.nan, np.nan
+    mean_x, mean_y = s_x / n, s_y / m
+    diff = mean_x - mean_y
+    pooled = (ss_x - n * np.outer(mean_x, mean_x) + ss_y - m * np.outer(mean_y, mean_y)) / (n + m - 2)
+    # Random features of low-dimensional inputs are nearly collinear: test in the pooled covariance's
+    # numerical range, with degrees of freedom equal to its rank
+    eigenvalues, eigenvectors = np.linalg.eigh(pooled)
+    kept = eigenvalues > rcond * max(eigenvalues.max(), 1e-300)
+    if not kept.any():
+        return float(diff @ diff), np.nan
+    projected = eigenvectors[:, kept].T @ diff
+    t2 = n * m / (n + m) * np.sum(projected ** 2 / eigenvalues[kept])
+    return float(diff @ diff), float(stats.chi2.sf(t2, kept.sum()))
+
+
+def rff_mmd_test(baseline, current, encoder, n_frequencies=64, bandwidth=None, batch_rows=65536, seed=0):
+    """Linear-time MMD test; baseline / current are DataFrames, Tables or iterables of chunks."""
+    if bandwidth is None and isinstance(baseline, (pd.DataFrame, pa.Table)):
+        rows = np.sort(np.random.default_rng(seed).choice(len(baseline), min(len(baseline), 1000), replace=False))
+        sample = baseline.iloc[rows] if isinstance(baseline, pd.DataFrame) else baseline.take(rows)
+        bandwidth = median_bandwidth(encode_features(sample, encoder), seed=seed)
+    elif bandwidth is None:
+        bandwidth = np.sqrt(2 * encoder["width"])   # streamed baseline: typical distance of standardised rows
+    frequencies = rff_frequencies(encoder["width"], n_frequencies, bandwidth, seed)
+    return mmd_from_moments(rff_moments(_chunks(baseline, batch_rows), encoder, frequencies),
+                            rff_moments(_chunks(current, batch_rows), encoder, frequencies))
+
+
+def _bottom_k_sample(chunks, encoder, max_rows, rng):
+    # Uniform sample of at most max_rows encoded rows from a stream of chunks: keep the smallest random keys
+    kept, keys = np.zeros((0, encoder["width"])), np.zeros(0)
+    for chunk in chunks:
+        kept, keys = np.vstack([kept, encode_features(chunk, encoder)]), np.append(keys, rng.random(len(chunk)))
+        if len(keys) > max_rows:
+            keep = np.argpartition(keys, max_rows)[:max_rows]
+            kept, keys = kept[keep], keys[keep]
+    return kept
+
+
+def domain_classifier_auc(baseline, current, encoder, max_rows=200_000, batch_rows=65536, seed=0):
+    """(held-out AUC, one-sided p-value) of a classifier separating baseline rows from current rows."""
+    from sklearn.ensemble import HistGradientBoostingClassifier   # optional dependency: pip install drift-detect[retrain]
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    rng = np.random.default_rng(seed)
+    X_base = _bottom_k_sample(_chunks(baseline, batch_rows), encoder, max_rows, rng)
+    X_curr = _bottom_k_sample(_chunks(current, batch_rows), encoder, max_rows, rng)
+    if len(X_base) < 4 or len(X_curr) < 4:
+        return np.nan, np.nan
+    X = np.vstack([X_base, X_curr])
+    y = np.r_[np.zeros(len(X_base)), np.ones(len(X_curr))]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.5, stratify=y, random_state=seed)
+    model = HistGradientBoostingClassifier(max_iter=100, random_state=seed).fit(X_train, y_train)
+    auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+    n_pos, n_neg = y_test.sum(), len(y_test) - y_test.sum()
+    se = np.sqrt((n_pos + n_neg + 1) / (12 * n_pos * n_neg))
+    return float(auc), float(stats.norm.sf((auc - 0.5) / se))
+
+
+def _multivariate_results(method, statistic, p_value, alpha, run_id, window_start):
+    metric_name = {"mmd": "mmd_rff", "classifier": "domain_auc"}[method]
+    results = DriftResults(1, run_id, window_start)
+    results.extend([MULTIVARIATE_FEATURE], "multivariate", metric_name, [statistic], [p_value], None,
+                   [p_value < alpha] if np.isfinite(p_value) else None)
+    return results.to_arrow()
+
+
+def multivariate_drift_tests(baseline, current, numeric_cols, categorical_cols, method="mmd", alpha=0.05,
+                             max_categories=20, n_frequencies=64, max_rows=200_000, batch_rows=65536, seed=0,
+                             run_id=None, window_start=None):
+    """One multivariate result row (method "mmd" or "classifier") in the drift results schema.
+
+    baseline is a DataFrame or Table (the encoder is fitted on it); current may also be an iterable of chunks.
+    """
+    if method not in ("mmd", "classifier"):
+        raise ValueError(f"unknown multivariate method {method!r}; expected 'mmd' or 'classifier'")
+    encoder = build_encoder(baseline, numeric_cols, categorical_cols, max_categories)
+    if method == "mmd":
+        statistic, p_value = rff_mmd_test(baseline, current, encoder, n_frequencies, batch_rows=batch_rows, seed=seed)
+    else:
+        statistic, p_value = domain_classifier_auc(baseline, current, encoder, max_rows, batch_rows, seed)
+    return _multivariate_results(method, statistic, p_value, alpha, run_id, window_start)
+
+
+def spark_rff_moments(sdf, encoder, frequencies):
+    # rff_moments per partition via mapInPandas, summed on the driver: one pass, one small row per partition
+    cols = [*encoder["numeric_cols"], *encoder["categories"]]
+    n_features = 2 * frequencies.shape[1]
+
+    def partition_moments(frames):
+        n, s, ss = rff_moments(frames, encoder, frequencies)
+        yield pd.DataFrame({"n": [n], "s": [s.tolist()], "ss": [ss.ravel().tolist()]})
+
+    n, s, ss = 0, np.zeros(n_features), np.zeros((n_features, n_features))
+    for row in sdf.select(*cols).mapInPandas(partition_moments, "n long, s array<double>, ss array<double>").collect():
+        n += row["n"]
+        s += np.asarray(row["s"])
+        ss += np.asarray(row["ss"]).reshape(n_features, n_features)
+    return n, s, ss
+
+
+def _spark_sample(sdf, cols, max_rows, seed, total=None):
+    from .arrow import spark_to_arrow
+
+    total = sdf.count() if total is None else total
+    fraction = min(1.0, 1.1 * max_rows / max(total, 1))   # slight oversample; trimmed to max_rows locally
+    return spark_to_arrow(sdf.select(*cols).sample(fraction=fraction, seed=seed))
+
+
+def spark_multivariate_drift_tests(baseline_sdf, current_sdf, numeric_cols, categorical_cols, method="mmd", alpha=0.05,
+                                   max_categories=20, n_frequencies=64, max_rows=200_000, seed=0, run_id=None,
+                                   window_start=None):
+    if method not in ("mmd", "classifier"):
+        raise ValueError(f"unknown multivariate method {method!r}; expected 'mmd' or 'classifier'")
+    cols = [*numeric_cols, *categorical_cols]
+    encoder = spark_build_encoder(baseline_sdf, numeric_cols, categorical_cols, max_categories)
+    if method == "mmd":
+        sample = encode_features(_spark_sample(baseline_sdf, cols, 1000, seed), encoder)
+        frequencies = rff_frequencies(encoder["width"], n_frequencies, median_bandwidth(sample, seed=seed), seed)
+        statistic, p_value = mmd_from_moments(spark_rff_moments(baseline_sdf, encoder, frequencies),
+                                              spark_rff_moments(current_sdf, encoder, frequencies))
+    else:
+        statistic, p_value = domain_classifier_auc(_spark_sample(baseline_sdf, cols, max_rows, seed),
+                                                   _spark_sample(current_sdf, cols, max_rows, seed), encoder, max_rows,
+                                                   seed=seed)
+    return _multivariate_results(method, statistic, p_value, alpha, run_id, window_start)
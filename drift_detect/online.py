@@ -0,0 +1,263 @@
+"""Online concept-drift detectors for per-event streams: ADWIN, Page-Hinkley and DDM.
+
+Each detector keeps constant (Page-Hinkley, DDM) or logarithmic (ADWIN) state and consumes events in
+NumPy batches: update(values) evaluates the detector's running statistics for the whole batch with
+cumulative sums, so the per-event Python cost disappears. A detection resets the detector, and the rest of
+the batch is re-evaluated from the reset state; Page-Hinkley and DDM scan in windows that start small after
+each detection and double up to chunk_size, so the work stays linear in the batch however often they alarm.
+NaN events are skipped; the positions within the last batch (NaNs included) of the events that raised a drift
+are in drift_indices. Page-Hinkley and DDM give
+exactly the verdicts of per-event updates.
+
+* ADWIN (Bifet & Gavalda, 2007) keeps an adaptive window of a real-valued signal (a feature value, a
+  model loss) and drops its oldest part whenever the means of two sub-windows differ by more than the
+  Hoeffding / Bernstein bound at confidence delta. The window is kept as an exponential histogram of
+  block summaries (count, sum, squared deviations), at most max_buckets per size, so memory is
+  O(max_buckets * log(width / clock)). Events enter in blocks of clock events, so window cuts, and hence
+  detections, fall on block boundaries.
+* Page-Hinkley detects a lasting shift of the mean: the cumulative deviation from the running mean
+  (less a tolerance delta) moves more than threshold away from its extreme.
+* DDM (Gama et al., 2004) watches a model's error stream (1 = misprediction). It tracks the error rate
+  p and its standard deviation s, and flags drift when p + s exceeds its minimum by drift_level standard
+  deviations (warning at warning_level).
+
+online_drift_results turns a set of detectors into rows of the drift results table (type "online",
+metric_name "adwin" / "page_hinkley" / "ddm"), flagging the detectors with any detection since the
+previous report (n_detections).
+"""
+import numpy as np
+
+from .results import DriftResults
+
+
+def _clean(values):
+    # Non-NaN values and their positions in the batch
+    values = np.asarray(values, dtype=float).ravel()
+    positions = np.flatnonzero(~np.isnan(values))
+    return values[positions], positions
+
+
+class ADWIN:
+    metric_name = "adwin"
+
+    def __init__(self, delta=0.002, clock=1024, max_buckets=5, min_window_length=5):
+        self.delta = delta
+        self.clock = clock
+        self.max_buckets = max_buckets
+        self.min_window_length = min_window_length
+        self._pending = np.empty(0)   # events of the unfinished block
+        # Buckets oldest first: events, sum, sum of squared deviations, level (bucket holds 2**level blocks)
+        self._n, self._sum, self._m2, self._level = [], [], [], []
+        self.n_detections = 0
+        self.drift_indices = np.empty(0, dtype=np.int64)
+        self.statistic = np.nan   # largest |mean difference| - bound over the splits of the last check
+
+    @property
+    def width(self):
+        return sum(self._n)
+
+    @property
+    def mean(self):
+        return sum(self._sum) / self.width if self._n else np.nan
+
+    @property
+    def drift_detected(self):
+        return len(self.drift_indices) > 0
+
+    def _merge(self, i):
+        # Merge bucket i + 1 into bucket i (parallel variance formula)
+        n0, n1 = self._n[i], self._n[i + 1]
+        delta = self._sum[i + 1] / n1 - self._sum[i] / n0
+        self._m2[i] += self._m2[i + 1] + delta * delta * n0 * n1 / (n0 + n1)
+        self._n[i] += n1
+        self._sum[i] += self._sum[i + 1]
+        self._level[i] += 1
+        for column in (self._n, self._sum, self._m2, self._level):
+            del column[i + 1]
+
+    def _insert(self, n, total, m2):
+        self._n.append(n)
+        self._sum.append(total)
+        self._m2.append(m2)
+        self._level.append(0)
+        # Levels never increase from oldest to newest, so each level's buckets are contiguous
+        level, end = 0, len(self._level)
+        while True:
+            start = end
+            while start > 0 and self._level[start - 1] == level:
+                start -= 1
+            if end - start <= self.max_buckets:
+                return
+            self._merge(start)   # the two oldest buckets of this level
+            level, end = level + 1, start + 1
+
+    def _cut(self):
+        # True (and the oldest bucket dropped) when some split of the window has significantly different means
+        if len(self._n) < 2:
+            return False
+        n, total, m2 = (np.asarray(column, dtype=float) for column in (self._n, self._sum, self._m2))
+        width = n.sum()
+        n0, s0 = np.cumsum(n)[:-1], np.cumsum(total)[:-1]
+        n1, s1 = width - n0, total.sum() - s0
+        mean = total.sum() / width
+        variance = (m2.sum() + (n * (total / n - mean) ** 2).sum()) / width
+        dd = np.log(2 * np.log(width) / self.delta)
+        m = 1 / (n0 - self.min_window_length + 1) + 1 / (n1 - self.min_window_length + 1)
+        bound = np.sqrt(2 * m * variance * dd) + 2 / 3 * dd * m
+        excess = np.abs(s0 / n0 - s1 / n1) - bound
+        excess[(n0 <= self.min_window_length) | (n1 <= self.min_window_length)] = -np.inf
+        self.statistic = excess.max()
+        if self.statistic <= 0:
+            return False
+        for column in (self._n, self._sum, self._m2, self._level):
+            del column[0]
+        return True
+
+    def update(self, values):
+        values, positions = _clean(values)
+        data = np.concatenate([self._pending, values])
+        k = len(data) // self.clock
+        blocks = data[:k * self.clock].reshape(k, self.clock)
+        sums = blocks.sum(axis=1)
+        m2s = ((blocks - (sums / self.clock)[:, None]) ** 2).sum(axis=1)
+        drift_indices = []
+        for b in range(k):
+            self._insert(self.clock, sums[b], m2s[b])
+            cut = False
+            while self._cut():
+                cut = True
+            if cut:
+                self.n_detections += 1
+                drift_indices.append((b + 1) * self.clock - len(self._pending) - 1)
+        self._pending = data[k * self.clock:]
+        self.drift_indices = positions[np.asarray(drift_indices, dtype=np.int64)]
+        return self
+
+
+class _CumulativeDetector:
+    # Detectors whose state is a few running sums: _scan evaluates a whole window at once
+    min_window = 256
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size   # largest scan window
+        self.n_detections = 0
+        self.drift_indices = np.empty(0, dtype=np.int64)
+        self._reset()
+
+    @property
+    def drift_detected(self):
+        return len(self.drift_indices) > 0
+
+    def update(self, values):
+        values, positions = _clean(values)
+        drift_indices = []
+        # Work past a detection is at most twice the distance to it plus min_window
+        offset, window = 0, min(self.min_window, self.chunk_size)
+        while offset < len(values):
+            hit = self._scan(values[offset:offset + window])
+            if hit is None:
+                offset += window
+                window = min(2 * window, self.chunk_size)
+            else:
+                drift_indices.append(offset + hit)
+                offset += hit + 1
+                window = min(self.min_window, self.chunk_size)
+        self.n_detections += len(drift_indices)
+        self.drift_indices = positions[np.asarray(drift_indices, dtype=np.int64)]
+        return self
+
+
+class PageHinkley(_CumulativeDetector):
+    metric_name = "page_hinkley"
+
+    def __init__(self, delta=0.005, threshold=50.0, min_instances=30, direction="both", chunk_size=65_536):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_instances = min_instances
+        self.direction = direction   # "up" (increase of the mean), "down" or "both"
+        super().__init__(chunk_size)
+
+    def _reset(self):
+        self.n = 0
+        self.sum = 0.0
+        self._up, self._up_min = 0.0, 0.0   # sum of (x - mean - delta) and its minimum
+        self._down, self._down_max = 0.0, 0.0   # sum of (x - mean + delta) and its maximum
+        self.statistic = 0.0
+
+    def _scan(self, x):
+        # Index of the first detection in x (state advanced up to it, then reset), or None (state advanced over x)
+        n = self.n + np.arange(1, len(x) + 1)
+        deviation = x - (self.sum + np.cumsum(x)) / n
+        up = self._up + np.cumsum(deviation - self.delta)
+        down = self._down + np.cumsum(deviation + self.delta)
+        up_min = np.minimum(self._up_min, np.minimum.accumulate(up))
+        down_max = np.maximum(self._down_max, np.maximum.accumulate(down))
+        statistic = {"up": up - up_min, "down": down_max - down}.get(self.direction)
+        if statistic is None:
+            statistic = np.maximum(up - up_min, down_max - down)
+        alarm = (statistic > self.threshold) & (n >= self.min_instances)
+        if alarm.any():
+            self._reset()
+            return int(alarm.argmax())
+        self.n, self.sum = int(n[-1]), self.sum + x.sum()
+        self._up, self._up_min, self._down, self._down_max = up[-1], up_min[-1], down[-1], down_max[-1]
+        self.statistic = statistic[-1]
+        return None
+
+
+class DDM(_CumulativeDetector):
+    # update(values): 1 for a misprediction, 0 for a correct one
+    metric_name = "ddm"
+
+    def __init__(self, min_instances=30, warning_level=2.0, drift_level=3.0, chunk_size=65_536):
+        self.min_instances = min_instances
+        self.warning_level = warning_level
+        self.drift_level = drift_level
+        super().__init__(chunk_size)
+
+    def _reset(self):
+        self.n = 0
+        self.errors = 0.0
+        self.p_min = self.s_min = self.ps_min = np.inf
+        self.statistic = 0.0   # (p + s - p_min) / s_min: drift above drift_level
+        self.warning = False
+
+    def _scan(self, x):
+        n = self.n + np.arange(1, len(x) + 1)
+        p = (self.errors + np.cumsum(x)) / n
+        s = np.sqrt(p * (1 - p) / n)
+        ps = p + s
+        valid = n >= self.min_instances
+        candidate = np.where(valid, ps, np.inf)
+        # The minimum is taken at the latest event with p + s <= the running minimum (ties move it forward)
+        running_min = np.minimum(self.ps_min, np.minimum.accumulate(candidate))
+        latest = np.maximum.accumulate(np.where(valid & (candidate <= running_min), np.arange(len(x)), -1))
+        p_min = np.where(latest >= 0, p[np.maximum(latest, 0)], self.p_min)
+        s_min = np.where(latest >= 0, s[np.maximum(latest, 0)], self.s_min)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            statistic = (ps - p_min) / s_min
+        alarm = valid & (ps > p_min + self.drift_level * s_min)
+        if alarm.any():
+            self._reset()
+            return int(alarm.argmax())
+        self.n, self.errors = int(n[-1]), self.errors + x.sum()
+        self.p_min, self.s_min, self.ps_min = p_min[-1], s_min[-1], running_min[-1]
+        self.statistic = statistic[-1]
+        self.warning = bool(valid[-1] and ps[-1] > p_min[-1] + self.warning_level * s_min[-1])
+        return None
+
+
+def online_drift_results(detectors, run_id=None, window_start=None):
+    """Drift results rows for {feature: detector or list of detectors}, e.g. once per reporting interval.
+
+    statistic is each detector's current statistic, and drift_flag whether it detected drift since the
+    previous report (n_detections is reset).
+    """
+    rows = [(feature, detector) for feature, found in detectors.items()
+            for detector in (found if isinstance(found, (list, tuple)) else [found])]
+    results = DriftResults(len(rows), run_id, window_start)
+    for feature, detector in rows:
+        results.extend([feature], "online", detector.metric_name, [detector.statistic], None, None,
+                       [detector.n_detections > 0])
+        detector.n_detections = 0
+    return results.to_arrow()
@@ -0,0 +1,102 @@
+"""Row-level out-of-distribution scores against the baseline profile.
+
+Each non-null feature value gets a surprisal, -log(baseline probability of a value like it):
+
+* numeric: the two-sided tail mass, 2 * min(P(X <= x), P(X >= x)), read off the profile's KS grid (the
+  sorted baseline, or up to ks_sketch_size quantiles). The PSI bins are equal-mass deciles, so their
+  shares say nothing about rarity; the finer grid does, and values beyond the baseline range get the floor.
+* categorical: the category's baseline share; unseen categories get the floor.
+
+The floor is 1 / (baseline rows + 1). A row's score is the mean surprisal over its non-null features (NaN
+when all are null), so rows can be ranked or thresholded, e.g. to drop suspect traffic before retraining.
+Scoring is a few vectorized lookups per feature, over chunk_rows rows at a time locally or per Arrow batch
+on Spark (mapInPandas).
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .arrow import factorize_arrow_columns, numeric_matrix
+
+OOD_SCORE_COL = "ood_score"
+
+
+def _score_tables(profile, numeric_cols, categorical_cols):
+    # Per-feature lookups built once: (sorted grid, floor) per numeric and (share by category, floor) per categorical
+    numeric = []
+    for col in numeric_cols:
+        grid = np.sort(np.asarray(profile.loc[col, "ks_values"], dtype=float))
+        numeric.append((grid[~np.isnan(grid)], 1 / (profile.loc[col, "row_count"] + 1)))
+    categorical = []
+    for col in categorical_cols:
+        counts = np.asarray(profile.loc[col, "category_counts"], dtype=float)
+        shares = pd.Series(counts / profile.loc[col, "row_count"], index=pd.Index(list(profile.loc[col, "categories"])))
+        categorical.append((shares, 1 / (profile.loc[col, "row_count"] + 1)))
+    return numeric, categorical
+
+
+def _category_codes(data, col):
+    # (codes with -1 for nulls, unique values as strings)
+    if isinstance(data, pa.Table):
+        codes, uniques = factorize_arrow_columns(data, [col])
+        return codes[:, 0], pd.Index(uniques[0]).astype(str)
+    codes, uniques = pd.factorize(data[col])
+    return codes, pd.Index(uniques).astype(str)
+
+
+def _score_chunk(data, numeric_cols, categorical_cols, tables):
+    numeric, categorical = tables
+    n_rows = data.num_rows if isinstance(data, pa.Table) else len(data)
+    total, present = np.zeros(n_rows), np.zeros(n_rows)
+    values = numeric_matrix(data, numeric_cols)
+    for j, (grid, floor) in enumerate(numeric):
+        x = values[:, j]
+        right = np.searchsorted(grid, x, side="right")
+        left = right.copy()   # differs only where x equals grid values: search those again
+        tied = (right > 0) & (grid[np.maximum(right - 1, 0)] == x)
+        left[tied] = np.searchsorted(grid, x[tied], side="left")
+        below, above = right / len(grid), 1 - left / len(grid)
+        surprisal = -np.log(np.clip(2 * np.minimum(below, above), floor, 1))
+        known = ~np.isnan(x)
+        total[known] += surprisal[known]
+        present += known
+    for col, (shares, floor) in zip(categorical_cols, categorical):
+        codes, uniques = _category_codes(data, col)
+        lookup = -np.log(np.maximum(shares.reindex(uniques).fillna(0).to_numpy(), floor))
+        known = codes >= 0
+        total[known] += lookup[codes[known]]
+        present += known
+    with np.errstate(invalid="ignore"):
+        return total / present
+
+
+def ood_scores(profile, data, numeric_cols, categorical_cols, chunk_rows=1_000_000):
+    """Per-row OOD score (mean surprisal in nats) of a pandas DataFrame or pyarrow Table."""
+    tables = _score_tables(profile, numeric_cols, categorical_cols)
+    n_rows = data.num_rows if isinstance(data, pa.Table) else len(data)
+    scores = np.empty(n_rows)
+    for start in range(0, n_rows, chunk_rows):
+        chunk = data.slice(start, chunk_rows) if isinstance(data, pa.Table) else data.iloc[start:start + chunk_rows]
+        scores[start:start + chunk_rows] = _score_chunk(chunk, numeric_cols, categorical_cols, tables)
+    return scores
+
+
+def add_ood_score(profile, data, numeric_cols, categorical_cols, output_col=OOD_SCORE_COL, chunk_rows=1_000_000):
+    # data with the score appended as output_col (same type as data)
+    scores = ood_scores(profile, data, numeric_cols, categorical_cols, chunk_rows)
+    if isinstance(data, pa.Table):
+        return data.append_column(output_col, pa.array(scores, pa.float64()))
+    return data.assign(**{output_col: scores})
+
+
+def spark_add_ood_score(profile, sdf, numeric_cols, categorical_cols, output_col=OOD_SCORE_COL):
+    """sdf with the OOD score column added: one mapInPandas pass, the lookups shipped in the closure."""
+    from pyspark.sql.types import DoubleType, StructField, StructType
+
+    tables = _score_tables(profile, numeric_cols, categorical_cols)
+
+    def score_batches(batches):
+        for batch in batches:
+            yield batch.assign(**{output_col: _score_chunk(batch, numeric_cols, categorical_cols, tables)})
+
+    return sdf.mapInPandas(score_batches, StructType([*sdf.schema.fields, StructField(output_col, DoubleType())]))
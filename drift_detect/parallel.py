@@ -0,0 +1,53 @@
+"""Per-feature parallelism: shard the columns of a feature matrix across a thread or process pool.
+
+Process workers attach to one shared-memory copy of the matrix instead of receiving pickled column
+data. Results always come back in column order.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+
+def _column_shard_worker(fn, shm_name, shape, dtype, col_indices, col_args):
+    shm = SharedMemory(name=shm_name)
+    try:
+        matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order="F")
+        results = [fn(matrix[:, j], arg) for j, arg in zip(col_indices, col_args)]
+        del matrix   # release the view before closing the segment
+        return results
+    finally:
+        shm.close()
+
+
+def map_columns(fn, matrix, col_args, executor="serial", max_workers=None):
+    # fn(column_values, col_arg) for every column of a 2-D numeric matrix
+    n_cols = matrix.shape[1]
+    if executor == "serial" or n_cols <= 1:
+        return [fn(matrix[:, j], col_args[j]) for j in range(n_cols)]
+    shards = np.array_split(np.arange(n_cols), min(max_workers or os.cpu_count(), n_cols))
+    if executor == "thread":
+        with ThreadPoolExecutor(len(shards)) as pool:
+            parts = list(pool.map(lambda idx: [fn(matrix[:, j], col_args[j]) for j in idx], shards))
+    elif executor == "process":
+        shm = SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf, order="F")[:] = matrix
+            with ProcessPoolExecutor(len(shards)) as pool:
+                parts = list(pool.map(_column_shard_worker, repeat(fn), repeat(shm.name), repeat(matrix.shape),
+                                      repeat(matrix.dtype), shards, [[col_args[j] for j in idx] for idx in shards]))
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        raise ValueError(f"Unknown executor: {executor!r} (expected 'serial', 'thread' or 'process')")
+    return [result for part in parts for result in part]
+
+
+def factorize_columns(df):
+    # Categorical columns as an int64 code matrix (shared-memory friendly) plus per-column uniques
+    codes, uniques = zip(*(pd.factorize(df[col]) for col in df.columns)) if len(df.columns) else ((), ())
+    return np.column_stack(codes).astype(np.int64) if codes else np.zeros((len(df), 0), dtype=np.int64), list(uniques)
@@ -0,0 +1,175 @@
+"""Single-job drift planner: every aggregate the drift tests need, for every feature, in one Spark job.
+
+compile_drift_plan builds one select and aggregation for the numeric features and one for the categorical
+ones. The numeric select computes a bucket index on the frozen PSI breakpoints for each feature, the
+categorical select a category key, and both explode the row wide -> long. Each aggregation is a
+groupBy(side, feature_idx, key) over the baseline and current tables unioned together. For each group it
+returns the row count and, for numeric buckets, min / max and percentiles within the bucket; categorical
+keys only need counts, so they get no percentile sketch (nor its sort-based aggregation fallback). Each
+column of each table is therefore read once, in one job, however many features are monitored. The driver
+receives one row per category and at most buckets + 3 rows per numeric feature. summarise_plan turns them
+into per-feature summaries:
+
+* rows and null counts,
+* bin counts on the PSI breakpoints,
+* exact min / max,
+* a piecewise-linear CDF through the within-bucket percentiles,
+* category counts.
+
+run_planned_drift_tests evaluates KS, PSI and chi-square from these summaries. KS compares the two
+summary CDFs; its error is at most the largest bucket share / quantile_grid plus 1 / accuracy per side
+(summaries' cdf_error). Its p-value uses the asymptotic distribution, as spark_ks_2samp does, at the
+statistic less that error.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .functions import _align_category_counts, chi_square_statistic, collapse_long_tail
+from .results import _finish_results, _spark_breakpoints
+
+
+def compile_drift_plan(sdfs, numeric_cols, categorical_cols, breakpoints, quantile_grid=16, accuracy=10000):
+    """One aggregated DataFrame (side, feature_idx, key, n, min, max, quantiles) over all of sdfs.
+
+    side is the position in sdfs; feature_idx numbers numeric_cols then categorical_cols. key is the
+    Bucketizer bucket of a numeric value (see spark_backend._bucket_splits) or the category, null for nulls.
+    """
+    from pyspark.sql import functions as F
+
+    from .spark_backend import _bucketize
+
+    numeric_cols, categorical_cols = list(numeric_cols), list(categorical_cols)
+
+    def explode(structs_of):
+        # (side, feature_idx, key[, value]) rows of every sdf, unioned
+        plan = None
+        for side, sdf in enumerate(sdfs):
+            source, structs = structs_of(sdf)
+            long = source.select(F.lit(side).alias("side"), F.explode(F.array(*structs)).alias("v")).select("side", "v.*")
+            plan = long if plan is None else plan.unionByName(long)
+        return plan
+
+    def numeric_structs(sdf):
+        source, bucket_cols, _ = _bucketize(sdf, numeric_cols, breakpoints)
+        return source, [F.struct(F.lit(j).alias("feature_idx"), F.col(b).cast("int").cast("string").alias("key"),
+                                 F.col(c).cast("double").alias("value"))
+                        for j, (c, b) in enumerate(zip(numeric_cols, bucket_cols))]
+
+    def categorical_structs(sdf):
+        return sdf.select(*categorical_cols), [
+            F.struct(F.lit(len(numeric_cols) + j).alias("feature_idx"), F.col(c).cast("string").alias("key"))
+            for j, c in enumerate(categorical_cols)
+        ]
+
+    probabilities = np.linspace(0, 1, quantile_grid + 1).tolist()
+    parts = []
+    if numeric_cols:
+        parts.append(explode(numeric_structs).groupBy("side", "feature_idx", "key").agg(
+            F.count(F.lit(1)).alias("n"), F.min("value").alias("min"), F.max("value").alias("max"),
+            F.percentile_approx("value", probabilities, accuracy).alias("quantiles"),
+        ))
+    if categorical_cols:
+        parts.append(explode(categorical_structs).groupBy("side", "feature_idx", "key").agg(
+            F.count(F.lit(1)).alias("n"), F.lit(None).cast("double").alias("min"), F.lit(None).cast("double").alias("max"),
+            F.lit(None).cast("array<double>").alias("quantiles"),
+        ))
+    return parts[0] if len(parts) == 1 else parts[0].unionByName(parts[1])
+
+
+def _summary_cdf(buckets, counts, quantiles):
+    # Knots (x, CDF) through each bucket's percentiles, buckets in value order; ties keep the largest CDF
+    if not len(buckets) or counts.sum() == 0:
+        return np.zeros(0), np.zeros(0)
+    order = np.argsort(buckets)
+    counts = counts[order]
+    before = np.concatenate([[0.0], np.cumsum(counts)[:-1]])
+    q = np.vstack([np.asarray(quantiles[k], dtype=float) for k in order])
+    probabilities = np.linspace(0, 1, q.shape[1])
+    x = q.ravel()
+    cdf = ((before[:, None] + probabilities[None, :] * counts[:, None]) / counts.sum()).ravel()
+    knots = np.unique(x)
+    return knots, cdf[np.searchsorted(x, knots, side="right") - 1]
+
+
+def summarise_plan(aggregated, numeric_cols, categorical_cols, breakpoints, sides=2, accuracy=10000):
+    """Per-side summaries from compile_drift_plan's result collected as a pandas DataFrame.
+
+    accuracy is the percentile_approx accuracy the plan was compiled with (for cdf_error).
+    """
+    from .spark_backend import _bucket_splits, _fold_bucket_counts
+
+    n_numeric, n_features = len(numeric_cols), len(numeric_cols) + len(categorical_cols)
+    summaries = []
+    for side in range(sides):
+        part = aggregated[aggregated["side"] == side]
+        feature_idx = part["feature_idx"].to_numpy()
+        n = part["n"].to_numpy(dtype=float)
+        null = part["key"].isna().to_numpy()
+        summary = {
+            "rows": np.bincount(feature_idx, weights=n, minlength=n_features),
+            "nulls": np.bincount(feature_idx[null], weights=n[null], minlength=n_features),
+            "bin_counts": np.zeros((breakpoints.shape[0] - 1, n_numeric)),
+            "min": np.full(n_numeric, np.nan), "max": np.full(n_numeric, np.nan),
+            "cdf": [], "cdf_error": np.zeros(n_numeric), "category_counts": [],
+        }
+        for j in range(n_numeric):
+            splits = _bucket_splits(breakpoints[:, j])
+            group = part[(feature_idx == j) & ~null]
+            buckets = group["key"].astype(int).to_numpy()
+            group, buckets = group[buckets < len(splits) - 1], buckets[buckets < len(splits) - 1]   # drop NaN bucket
+            counts = group["n"].to_numpy(dtype=float)
+            summary["bin_counts"][:, j] = _fold_bucket_counts(np.bincount(buckets, weights=counts, minlength=len(splits)),
+                                                              breakpoints[:, j])
+            if len(group):
+                summary["min"][j], summary["max"][j] = group["min"].min(), group["max"].max()
+                quantile_grid = len(group["quantiles"].iloc[0]) - 1
+                summary["cdf_error"][j] = counts.max() / counts.sum() / quantile_grid + 1 / accuracy
+            summary["cdf"].append((*_summary_cdf(buckets, counts, group["quantiles"].tolist()), counts.sum()))
+        for j in range(len(categorical_cols)):
+            group = part[(feature_idx == n_numeric + j) & ~null]
+            summary["category_counts"].append(pd.Series(group["n"].to_numpy(dtype="int64"), index=group["key"].tolist()))
+        summaries.append(summary)
+    return summaries
+
+
+def summary_ks_2samp(baseline_cdf, current_cdf, error=0.0):
+    # (KS statistic, asymptotic p-value) between two summary CDFs (knots, cdf, non-null rows); error bounds
+    # |statistic - exact D| (both sides' cdf_error) and the p-value is taken at the statistic less it
+    (x_b, cdf_b, n_b), (x_c, cdf_c, n_c) = baseline_cdf, current_cdf
+    if not n_b or not n_c:
+        return np.nan, np.nan
+    grid = np.union1d(x_b, x_c)
+    ks_stat = np.abs(np.interp(grid, x_b, cdf_b, left=0, right=1) - np.interp(grid, x_c, cdf_c, left=0, right=1)).max()
+    return ks_stat, stats.kstwo.sf(max(ks_stat - error, 0.0), np.round(n_b * n_c / (n_b + n_c)))
+
+
+def spark_plan_summaries(sdfs, numeric_cols, categorical_cols, breakpoints, quantile_grid=16, accuracy=10000):
+    aggregated = compile_drift_plan(sdfs, numeric_cols, categorical_cols, breakpoints, quantile_grid, accuracy).toPandas()
+    return summarise_plan(aggregated, numeric_cols, categorical_cols, breakpoints, len(sdfs), accuracy)
+
+
+def run_planned_drift_tests(baseline_sdf, current_sdf, numeric_cols, categorical_cols, alpha=0.05, buckets=10,
+                            max_categories=None, breakpoints=None, breakpoint_cache=None, baseline_table=None,
+                            quantile_grid=16, accuracy=10000, run_id=None, window_start=None, metrics=()):
+    """run_spark_drift_tests from one read of each table column.
+
+    breakpoints ((buckets + 1) x numeric features, e.g. from the baseline profile) skip the baseline
+    quantile pass; otherwise they come from breakpoint_cache or one approxQuantile pass.
+    """
+    if breakpoints is None:
+        breakpoints = _spark_breakpoints(baseline_sdf, numeric_cols, buckets, breakpoint_cache, baseline_table)
+    baseline, current = spark_plan_summaries([baseline_sdf, current_sdf], numeric_cols, categorical_cols, breakpoints,
+                                             quantile_grid, accuracy)
+    n_numeric = len(numeric_cols)
+    ks_results = [summary_ks_2samp(b, c, b_error + c_error) for b, c, b_error, c_error
+                  in zip(baseline["cdf"], current["cdf"], baseline["cdf_error"], current["cdf_error"])]
+    numeric_histograms = (baseline["bin_counts"], current["bin_counts"], baseline["rows"][:n_numeric],
+                          current["rows"][:n_numeric])
+    chi_outputs = []
+    for exp_counts, act_counts in zip(baseline["category_counts"], current["category_counts"]):
+        exp_aligned, act_aligned = _align_category_counts(exp_counts, act_counts)
+        chi_outputs.append((*chi_square_statistic(*collapse_long_tail(exp_aligned, act_aligned, max_categories)),
+                            exp_aligned, act_aligned))
+    return _finish_results(numeric_cols, ks_results, numeric_histograms, categorical_cols, chi_outputs, alpha, run_id,
+                           window_start, metrics)
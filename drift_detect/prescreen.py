@@ -0,0 +1,154 @@
+"""Metadata-only drift pre-screen from Delta log / Parquet footer statistics, ahead of the full tests.
+
+Delta add actions and Parquet row groups already record row counts and per-column min / max / null
+counts. These can prove drift but never its absence (a shift inside the baseline range leaves min / max
+and null counts unchanged), so only drift verdicts are settled from them:
+
+* drift: the nulls share grew by more than null_drift, or a numeric feature has a gross range shift. Rows in
+  current files whose [min, max] lies entirely outside the baseline range are certainly outside it. Their
+  share above (below) the range is a lower bound on the KS statistic. With an out-of-range share L in total,
+  PSI is at least L * ln(1 / (1 - L)). The feature is flagged when both lower bounds clear the batch verdict
+  (ks_p < alpha and PSI > 0.1).
+* scanned: every other feature, including features without statistics. Databricks collects statistics
+  for the first 32 columns by default (delta.dataSkippingNumIndexedCols).
+
+Statistics tables have one row per file or row group, with columns num_records, null_count.<col>,
+min.<col> and max.<col> (deltalake's flattened add actions).
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy import stats
+
+from .results import DriftResults
+
+
+def _parquet_statistics(files):
+    records = []
+    for file in files:
+        metadata = pq.ParquetFile(file).metadata
+        names = [metadata.schema.column(j).path for j in range(metadata.num_columns)]
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            record = {"num_records": row_group.num_rows}
+            for j, name in enumerate(names):
+                statistics = row_group.column(j).statistics
+                if statistics is None:
+                    continue
+                if statistics.has_null_count:
+                    record[f"null_count.{name}"] = statistics.null_count
+                if statistics.has_min_max:
+                    record[f"min.{name}"], record[f"max.{name}"] = statistics.min, statistics.max
+            records.append(record)
+    return pd.DataFrame.from_records(records)
+
+
+def file_statistics(path):
+    # Per-file (Delta) or per-row-group (Parquet) statistics of a local table; empty for formats without any
+    path = Path(path)
+    if (path / "_delta_log").is_dir():
+        from deltalake import DeltaTable   # optional dependency: pip install drift-detect[delta]
+
+        return pa.table(DeltaTable(str(path)).get_add_actions(flatten=True)).to_pandas()
+    if path.is_dir():
+        return _parquet_statistics(sorted(path.rglob("*.parquet")))
+    return _parquet_statistics([path]) if path.suffix == ".parquet" else pd.DataFrame()
+
+
+def spark_file_statistics(table, columns, spark=None):
+    """Statistics of the live files of a Delta table, read from its transaction log (no data files)."""
+    from pyspark.sql import functions as F
+    from pyspark.sql.utils import AnalysisException
+
+    from .spark_backend import get_spark
+
+    spark = get_spark(spark)
+    log = f"{spark.sql(f'DESCRIBE DETAIL {table}').first()['location'].rstrip('/')}/_delta_log"
+    actions_schema = "add STRUCT<path: STRING, stats: STRING>, remove STRUCT<path: STRING>"
+    try:
+        checkpoint = spark.read.json(f"{log}/_last_checkpoint").first()["version"]
+        adds = (spark.read.parquet(f"{log}/{checkpoint:020d}.checkpoint*.parquet")
+                .where(F.col("add").isNotNull()).select("add.path", "add.stats"))
+    except AnalysisException:   # no checkpoint yet
+        checkpoint, adds = -1, None
+    commits = (spark.read.schema(actions_schema).json(f"{log}/*.json")
+               .withColumn("version", F.regexp_extract(F.input_file_name(), r"(\d+)\.json$", 1).cast("long"))
+               .where(F.col("version") > checkpoint))
+    commit_adds = commits.where(F.col("add").isNotNull()).select("add.path", "add.stats")
+    adds = commit_adds if adds is None else adds.unionByName(commit_adds)
+    removed = commits.where(F.col("remove").isNotNull()).select("remove.path")
+    live = adds.join(removed, "path", "left_anti")
+
+    def stat(kind, col):
+        return F.get_json_object("stats", f"$.{kind}['{col}']")
+
+    fields = [F.get_json_object("stats", "$.numRecords").cast("long").alias("num_records")]
+    for col in columns:
+        fields += [stat("nullCount", col).cast("long").alias(f"null_count.{col}"),
+                   stat("minValues", col).alias(f"min.{col}"), stat("maxValues", col).alias(f"max.{col}")]
+    return live.select(*fields).toPandas()
+
+
+def _column(statistics, name, dtype=float):
+    # Column as an array, or None when any file lacks the statistic
+    if name not in statistics or statistics[name].isna().any():
+        return None
+    return statistics[name].to_numpy(dtype=dtype)
+
+
+def _null_shares(baseline, current, col):
+    shares = []
+    for statistics in (baseline, current):
+        rows, nulls = _column(statistics, "num_records"), _column(statistics, f"null_count.{col}")
+        if rows is None or nulls is None or rows.sum() == 0:
+            return None
+        shares.append((rows.sum(), nulls.sum()))
+    return shares
+
+
+def prescreen_drift(baseline_statistics, current_statistics, numeric_cols, categorical_cols, alpha=0.05,
+                    null_drift=0.2, run_id=None, window_start=None):
+    """Flag the features metadata proves drifted and list the rest, which still need a full scan.
+
+    Returns (results, scan_numeric_cols, scan_categorical_cols). results has one metric_name "metadata" row
+    (drift_flag True) per settled feature. statistic and p_value hold the KS lower bound and its p-value
+    (numeric features), and effect_size the change in null share.
+    """
+    settled, scan = [], {"numeric": [], "categorical": []}
+    for feature_type, cols in (("numeric", numeric_cols), ("categorical", categorical_cols)):
+        for col in cols:
+            shares = _null_shares(baseline_statistics, current_statistics, col)
+            if shares is None:
+                scan[feature_type].append(col)
+                continue
+            (n_base, null_base), (n_curr, null_curr) = shares
+            null_change = null_curr / n_curr - null_base / n_base
+            if feature_type == "categorical":
+                ks_lower, ks_p, range_drift = np.nan, np.nan, False
+            else:
+                base_min, base_max = (_column(baseline_statistics, f"{k}.{col}") for k in ("min", "max"))
+                curr_min, curr_max = (_column(current_statistics, f"{k}.{col}") for k in ("min", "max"))
+                if any(v is None for v in (base_min, base_max, curr_min, curr_max)):
+                    scan[feature_type].append(col)
+                    continue
+                lo, hi = base_min.min(), base_max.max()
+                non_null = _column(current_statistics, "num_records") - _column(current_statistics, f"null_count.{col}")
+                total = max(non_null.sum(), 1.0)
+                above, below = non_null[curr_min > hi].sum() / total, non_null[curr_max < lo].sum() / total
+                ks_lower = max(above, below)
+                n_eff = np.round((n_base - null_base) * total / ((n_base - null_base) + total))
+                ks_p = stats.kstwo.sf(ks_lower, max(n_eff, 1))
+                out_of_range = min(above + below, 1 - 1e-12)
+                range_drift = ks_p < alpha and out_of_range * -np.log1p(-out_of_range) > 0.1
+            if range_drift or null_change > null_drift:
+                settled.append((col, feature_type, ks_lower, ks_p, null_change))
+            else:
+                scan[feature_type].append(col)
+
+    results = DriftResults(len(settled), run_id, window_start)
+    for col, feature_type, ks_lower, ks_p, null_change in settled:
+        results.extend([col], feature_type, "metadata", [ks_lower], [ks_p], [null_change], [True])
+    return results.to_arrow(), scan["numeric"], scan["categorical"]
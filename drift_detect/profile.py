@@ -0,0 +1,149 @@
+"""Baseline profiles: the baseline summarised once so drift runs never re-read the raw table."""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import stats
+
+from .arrow import arrow_category_counts, numeric_matrix, spark_to_arrow
+from .functions import _bin_counts_columns, _chi_square_from_counts, _psi_from_percents
+
+BASELINE_PROFILE_SCHEMA = (
+    "feature STRING, type STRING, row_count LONG, breakpoints ARRAY<DOUBLE>, bin_counts ARRAY<LONG>, "
+    "ks_values ARRAY<DOUBLE>, ks_exact BOOLEAN, categories ARRAY<STRING>, category_counts ARRAY<LONG>"
+)
+
+
+def build_baseline_profile(baseline, numeric_cols, categorical_cols, buckets=10, ks_sketch_size=2048):
+    # One row per feature: PSI breakpoints + bin counts and a KS sample/quantile grid for numeric
+    # columns, category counts for categorical columns
+    # baseline may be a pandas DataFrame or a pyarrow Table
+    numeric = None
+    if numeric_cols:
+        values = np.sort(numeric_matrix(baseline, numeric_cols), axis=0)
+        breakpoints = np.percentile(values, np.linspace(0, 100, buckets + 1), axis=0)
+        bin_counts = _bin_counts_columns(values, breakpoints)
+        ks_exact = len(values) <= ks_sketch_size
+        ks_values = values if ks_exact else np.percentile(values, np.linspace(0, 100, ks_sketch_size), axis=0)
+        numeric = (breakpoints, bin_counts, ks_values, ks_exact)
+    category_counts = [
+        arrow_category_counts(baseline.column(col)) if isinstance(baseline, pa.Table) else baseline[col].value_counts()
+        for col in categorical_cols
+    ]
+    n_rows = baseline.num_rows if isinstance(baseline, pa.Table) else len(baseline)
+    return _profile_frame(n_rows, numeric_cols, numeric, categorical_cols, category_counts)
+
+
+def _profile_frame(n_rows, numeric_cols, numeric, categorical_cols, category_counts):
+    # numeric: (breakpoints, bin_counts, ks_values, ks_exact), per-column arrays (... x features)
+    rows = []
+    if numeric_cols:
+        breakpoints, bin_counts, ks_values, ks_exact = numeric
+        for j, col in enumerate(numeric_cols):
+            rows.append({"feature": col, "type": "numeric", "row_count": n_rows,
+                         "breakpoints": breakpoints[:, j].tolist(), "bin_counts": bin_counts[:, j].tolist(),
+                         "ks_values": ks_values[:, j].tolist(), "ks_exact": ks_exact,
+                         "categories": None, "category_counts": None})
+    for col, counts in zip(categorical_cols, category_counts):
+        rows.append({"feature": col, "type": "categorical", "row_count": n_rows,
+                     "breakpoints": None, "bin_counts": None, "ks_values": None, "ks_exact": None,
+                     "categories": [str(c) for c in counts.index], "category_counts": counts.tolist()})
+    return pd.DataFrame(rows)
+
+
+def spark_build_baseline_profile(sdf, numeric_cols, categorical_cols, buckets=10, ks_sketch_size=2048,
+                                 relative_error=1e-4):
+    """build_baseline_profile for a Spark DataFrame from aggregates: only quantiles and counts reach the driver.
+
+    Breakpoints and the KS grid come from one approxQuantile pass (within relative_error in rank of the
+    exact percentiles), bin and category counts from one groupBy each. A baseline of at most
+    ks_sketch_size rows is collected and profiled exactly.
+    """
+    from .spark_backend import spark_bin_counts, spark_category_counts
+
+    sdf = sdf.select(*numeric_cols, *categorical_cols)
+    n_rows = sdf.count()
+    if n_rows <= ks_sketch_size:
+        return build_baseline_profile(spark_to_arrow(sdf), numeric_cols, categorical_cols, buckets, ks_sketch_size)
+    numeric = None
+    if numeric_cols:
+        probabilities = [*np.linspace(0, 1, buckets + 1), *np.linspace(0, 1, ks_sketch_size)]
+        quantiles = np.array(sdf.approxQuantile(list(numeric_cols), probabilities, relative_error), dtype=float).T
+        breakpoints, ks_values = quantiles[:buckets + 1], quantiles[buckets + 1:]
+        bin_counts, _ = spark_bin_counts(sdf, numeric_cols, breakpoints)
+        numeric = (breakpoints, bin_counts.astype("int64"), ks_values, False)
+    category_counts = [counts.sort_values(ascending=False, kind="stable")
+                       for counts in (spark_category_counts(sdf, categorical_cols) if categorical_cols else [])]
+    return _profile_frame(n_rows, numeric_cols, numeric, categorical_cols, category_counts)
+
+
+def save_baseline_profile(profile, table=None, path=None, spark=None):
+    # Delta table when a Spark session is available, local Parquet otherwise
+    if path is not None:
+        profile.to_parquet(path, index=False)
+    else:
+        from .spark_backend import get_spark
+
+        (get_spark(spark).createDataFrame(profile, schema=BASELINE_PROFILE_SCHEMA)
+         .write.mode("overwrite").option("overwriteSchema", "true").saveAsTable(table))
+
+
+def load_baseline_profile(table=None, path=None, spark=None):
+    if path is not None:
+        profile = pd.read_parquet(path)
+    else:
+        from .spark_backend import get_spark
+
+        profile = get_spark(spark).table(table).toPandas()
+    return profile.set_index("feature", drop=False)
+
+
+def profile_breakpoints(profile, numeric_cols):
+    # (buckets + 1) x len(numeric_cols) stored PSI breakpoints, e.g. to bin other data on the baseline's bins
+    if not len(numeric_cols):
+        return np.zeros((2, 0))   # nothing to bin; callers only use the column count
+    return np.column_stack([np.asarray(profile.loc[col, "breakpoints"], dtype=float) for col in numeric_cols])
+
+
+def bin_counts_from_profile(profile, actual):
+    # (expected, actual) PSI bin counts on the stored breakpoints, (bins x features); profile rows must be in
+    # the same order as actual's columns
+    breakpoints = np.array([np.asarray(b, dtype=float) for b in profile["breakpoints"]]).T
+    expected_counts = np.array([np.asarray(c, dtype=float) for c in profile["bin_counts"]]).T
+    actual = np.asarray(actual, dtype=float)
+    if actual.ndim == 1:
+        actual = actual[:, None]
+    return expected_counts, _bin_counts_columns(np.sort(actual, axis=0), breakpoints)
+
+
+def population_stability_index_from_profile(profile, actual):
+    # Batched PSI against stored breakpoints; profile rows must be in the same order as actual's columns
+    expected_counts, actual_counts = bin_counts_from_profile(profile, actual)
+    return _psi_from_percents(expected_counts / profile["row_count"].to_numpy(dtype=float), actual_counts / len(actual))
+
+
+def ks_test_from_profile(profile_row, actual):
+    baseline_values = np.asarray(profile_row["ks_values"], dtype=float)
+    if profile_row["ks_exact"]:
+        result = stats.ks_2samp(baseline_values, actual)
+        return result.statistic, result.pvalue
+    # Quantile-grid sketch: the baseline CDF is linearly interpolated between the stored quantiles,
+    # so D is within 1 / (len(ks_values) - 1) of the exact two-sample statistic
+    actual_sorted = np.sort(np.asarray(actual, dtype=float))
+    n_actual = len(actual_sorted)
+    grid_probs = np.linspace(0, 1, len(baseline_values))
+    baseline_cdf = np.interp(actual_sorted, baseline_values, grid_probs, left=0.0, right=1.0)
+    actual_cdf_at_grid = np.searchsorted(actual_sorted, baseline_values, side="right") / n_actual
+    ks_stat = max(
+        np.abs(baseline_cdf - np.arange(1, n_actual + 1) / n_actual).max(),
+        np.abs(baseline_cdf - np.arange(n_actual) / n_actual).max(),
+        np.abs(grid_probs - actual_cdf_at_grid).max(),
+    )
+    n_baseline = profile_row["row_count"]
+    ks_p = stats.kstwo.sf(ks_stat, np.round(n_baseline * n_actual / (n_baseline + n_actual)))
+    return ks_stat, ks_p
+
+
+def chi_square_test_from_profile(profile_row, actual, max_categories=None):
+    exp_counts = pd.Series(np.asarray(profile_row["category_counts"]), index=list(profile_row["categories"]))
+    # Nulls are not a category, as in run_drift_tests
+    return _chi_square_from_counts(exp_counts, actual.dropna().astype(str).value_counts(), max_categories)
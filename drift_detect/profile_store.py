@@ -0,0 +1,210 @@
+"""Hourly histogram store with prefix sums: drift between any two time windows without reading raw data.
+
+Rows are counted per hour on the baseline profile's frozen bins. Numeric features use the PSI breakpoints
+with np.histogram semantics, as in population_stability_index. Categorical features use the profile's
+categories plus one slot for unseen categories. For every hour the store keeps the running total of these
+counts since its first hour, so the counts of any window are one subtraction of two cumulative rows,
+whatever its length. window_drift_tests compares two windows (e.g. the last 7 days with the same 7 days a
+month earlier), or a window with the baseline profile, using PSI and chi-square.
+
+Hours are UTC epoch hours; windows are [start, end) on hour boundaries. Late rows for an hour already in
+the store are added to it, and the running totals after it are updated. For tables that are re-read on
+every run, ingest only hours from since on (e.g. the store's last hour, last_hour) and pass replace=True:
+the counts of each hour in the data then replace the stored ones, so re-ingesting an hour does not double
+count it.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .functions import _psi_from_percents, chi_square_statistic_batch
+from .profile import profile_breakpoints
+from .results import DriftResults
+from .segments import segment_counts, spark_segment_counts
+
+_HOUR_COL = "__hour"
+
+
+def _epoch_hour(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    timestamp = timestamp.tz_localize("UTC") if timestamp.tz is None else timestamp
+    return (timestamp - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(hours=1)
+
+
+def _hour_timestamp(hour):
+    return pd.Timestamp(0, tz="UTC") + pd.Timedelta(hours=int(hour))
+
+
+class HistogramStore:
+    """Cumulative per-hour bin and category counts for the given features of a baseline profile."""
+
+    def __init__(self, profile, numeric_cols, categorical_cols):
+        self.profile = profile
+        self.numeric_cols, self.categorical_cols = list(numeric_cols), list(categorical_cols)
+        self.breakpoints = profile_breakpoints(profile, self.numeric_cols)
+        self.categories = [pd.Index(list(profile.loc[col, "categories"])).astype(str) for col in self.categorical_cols]
+        self.start = None   # epoch hour of the first cumulative row
+        # Row h + 1 holds the counts of every hour up to and including start + h; row 0 is all zeros
+        self.cum_rows = np.zeros(1)
+        self.cum_bins = np.zeros((1, self.breakpoints.shape[0] - 1, len(self.numeric_cols)))
+        self.cum_categories = [np.zeros((1, len(c) + 1)) for c in self.categories]   # + unseen slot
+
+    @property
+    def hours(self):
+        return len(self.cum_rows) - 1
+
+    @property
+    def span(self):
+        # (first hour, end hour) as UTC timestamps; None while empty
+        if self.start is None:
+            return None
+        return _hour_timestamp(self.start), _hour_timestamp(self.start + self.hours)
+
+    @property
+    def last_hour(self):
+        # Start of the last stored hour as a UTC timestamp; None while empty
+        return None if self.start is None else _hour_timestamp(self.start + self.hours - 1)
+
+    def _extend(self, first, last):
+        # Grow the hour axis to cover [first, last]: totals before the old start are zero, after its end constant
+        if self.start is None:
+            self.start = first
+        before, after = max(self.start - first, 0), max(last - (self.start + self.hours - 1), 0)
+        if not before and not after:
+            return
+
+        def grow(cum):
+            return np.concatenate([np.zeros((before, *cum.shape[1:])), cum, np.repeat(cum[-1:], after, axis=0)])
+
+        self.cum_rows = grow(self.cum_rows)
+        self.cum_bins = grow(self.cum_bins)
+        self.cum_categories = [grow(cum) for cum in self.cum_categories]
+        self.start -= before
+
+    def add_counts(self, hours, rows, bin_counts, category_counts, replace=False):
+        """Fold per-hour counts in: hours (epoch hours), rows (H,), bin_counts (H x bins x numeric features),
+        category_counts one (H x categories + 1) array per categorical feature. With replace, they replace
+        the stored counts of those hours instead of adding to them."""
+        hours = np.asarray(hours, dtype=np.int64)
+        if not len(hours):
+            return self
+        self._extend(int(hours.min()), int(hours.max()))
+        idx = hours - self.start
+        first = int(idx.min())
+        for cum, counts in ((self.cum_rows, rows), (self.cum_bins, bin_counts), *zip(self.cum_categories, category_counts)):
+            dense = np.zeros((self.hours - first, *cum.shape[1:]))
+            np.add.at(dense, idx - first, np.asarray(counts, dtype=float))
+            if replace:
+                stored = np.unique(idx)
+                dense[stored - first] -= cum[stored + 1] - cum[stored]
+            cum[first + 1:] += np.cumsum(dense, axis=0)
+        return self
+
+    def _add_segment_counts(self, counts, replace=False):
+        hours = counts["keys"][_HOUR_COL].to_numpy(dtype=np.int64)
+        category_counts = []
+        for categories, table in zip(self.categories, counts["category_counts"]):
+            known = table.reindex(columns=categories, fill_value=0).to_numpy(dtype=float)
+            unseen = table.to_numpy(dtype=float).sum(axis=1) - known.sum(axis=1)
+            category_counts.append(np.column_stack([known, unseen]))
+        return self.add_counts(hours, counts["rows"], counts["bin_counts"], category_counts, replace)
+
+    def ingest(self, data, timestamp_col, since=None, replace=False):
+        # Count a pandas DataFrame or pyarrow Table by the hour of timestamp_col, from the hour of since on
+        columns = [timestamp_col, *self.numeric_cols, *self.categorical_cols]
+        frame = data[columns].copy() if isinstance(data, pd.DataFrame) else data.select(columns)
+        if isinstance(frame, pa.Table):
+            frame = frame.filter(pc.is_valid(frame.column(timestamp_col)))
+            timestamps = pc.cast(frame.column(timestamp_col), pa.timestamp("us", tz="UTC"))
+            frame = frame.append_column(_HOUR_COL, pc.divide(pc.cast(timestamps, pa.int64()), 3_600_000_000))
+        else:
+            frame = frame[frame[timestamp_col].notna()]
+            timestamps = pd.to_datetime(frame[timestamp_col], utc=True)
+            frame[_HOUR_COL] = (timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(hours=1)
+        if since is not None:
+            hour = _epoch_hour(since)
+            frame = (frame.filter(pc.greater_equal(frame.column(_HOUR_COL), hour)) if isinstance(frame, pa.Table)
+                     else frame[frame[_HOUR_COL] >= hour])
+        counts = segment_counts(frame, [_HOUR_COL], self.numeric_cols, self.breakpoints, self.categorical_cols)
+        return self._add_segment_counts(counts, replace)
+
+    def spark_ingest(self, sdf, timestamp_col, since=None, replace=False):
+        # Same as ingest from one groupBy(hour, feature, bucket / category) job
+        from pyspark.sql import functions as F
+
+        hourly = (sdf.where(F.col(timestamp_col).isNotNull())
+                  .withColumn(_HOUR_COL, F.floor(F.unix_timestamp(timestamp_col) / 3600).cast("long")))
+        if since is not None:
+            hourly = hourly.where(F.col(_HOUR_COL) >= _epoch_hour(since))
+        counts = spark_segment_counts(hourly, [_HOUR_COL], self.numeric_cols, self.breakpoints, self.categorical_cols)
+        return self._add_segment_counts(counts, replace)
+
+    def window_counts(self, start, end):
+        """Rows, bin counts (bins x numeric features) and category counts of [start, end): one subtraction."""
+        if self.start is None:
+            lo = hi = 0
+        else:
+            lo, hi = (int(np.clip(_epoch_hour(t) - self.start, 0, self.hours)) for t in (start, end))
+            hi = max(hi, lo)
+        return {"rows": self.cum_rows[hi] - self.cum_rows[lo], "bin_counts": self.cum_bins[hi] - self.cum_bins[lo],
+                "category_counts": [cum[hi] - cum[lo] for cum in self.cum_categories]}
+
+    def window_drift_tests(self, current, reference=None, alpha=0.05, run_id=None):
+        """PSI / chi-square of the current (start, end) window against the reference window or, when None,
+        the baseline profile. Numeric rows report PSI, categorical rows chi-square with categorical PSI."""
+        actual = self.window_counts(*current)
+        expected = self.window_counts(*reference) if reference is not None else None
+        results = DriftResults(len(self.numeric_cols) + len(self.categorical_cols), run_id, current[0])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.numeric_cols:
+                if expected is None:
+                    bin_counts = np.column_stack([np.asarray(self.profile.loc[col, "bin_counts"], dtype=float)
+                                                  for col in self.numeric_cols])
+                    expected_percents = bin_counts / self.profile.loc[self.numeric_cols, "row_count"].to_numpy(dtype=float)
+                else:
+                    expected_percents = expected["bin_counts"] / expected["rows"]
+                psi = _psi_from_percents(expected_percents, actual["bin_counts"] / actual["rows"])
+                results.extend(self.numeric_cols, "numeric", "psi", psi, None, psi, psi > 0.1)
+
+            chi = np.full((len(self.categorical_cols), 3), np.nan)
+            for j, col in enumerate(self.categorical_cols):
+                act_counts = actual["category_counts"][j]
+                exp_counts = (np.append(np.asarray(self.profile.loc[col, "category_counts"], dtype=float), 0.0)
+                              if expected is None else expected["category_counts"][j])
+                if act_counts.sum() > 0 and exp_counts.sum() > 0:
+                    chi2, chi_p = chi_square_statistic_batch(exp_counts, act_counts[None, :])
+                    categorical_psi = _psi_from_percents((exp_counts / exp_counts.sum())[:, None],
+                                                         (act_counts / act_counts.sum())[:, None])
+                    chi[j] = chi2[0], chi_p[0], categorical_psi[0]
+        results.extend(self.categorical_cols, "categorical", "chi2", chi[:, 0], chi[:, 1], chi[:, 2], chi[:, 1] < alpha)
+        return results.to_arrow()
+
+    def save(self, path):
+        # One .npz file (e.g. on a Unity Catalog volume), written atomically
+        path = Path(path)
+        meta = {"numeric_cols": self.numeric_cols, "categorical_cols": self.categorical_cols, "start": self.start,
+                "categories": [c.tolist() for c in self.categories]}
+        arrays = {f"cum_categories_{j}": cum for j, cum in enumerate(self.cum_categories)}
+        tmp = path.with_name(f"{path.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), breakpoints=self.breakpoints, cum_rows=self.cum_rows,
+                     cum_bins=self.cum_bins, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path, profile):
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            store = cls(profile, meta["numeric_cols"], meta["categorical_cols"])
+            if (not np.array_equal(store.breakpoints, saved["breakpoints"])
+                    or [c.tolist() for c in store.categories] != meta["categories"]):
+                raise ValueError(f"{path} was built on different bins than this baseline profile")
+            store.start = meta["start"]
+            store.cum_rows, store.cum_bins = saved["cum_rows"], saved["cum_bins"]
+            store.cum_categories = [saved[f"cum_categories_{j}"] for j in range(len(store.categories))]
+        return store
@@ -0,0 +1,229 @@
+"""Running the drift tests for every feature and assembling the results table.
+
+Results are typed and columnar: one row per (feature, test) with a numeric statistic, p-value and effect
+size, tagged with the run id and window start so drift history can be filtered and aggregated directly.
+Numeric features report metric_name "ks" with PSI as the effect size; categorical features report "chi2"
+with categorical PSI. Optional divergence metrics (drift_detect.metrics) add one row per feature and
+metric, computed from the same bin / category counts, with a null drift_flag.
+segment is null for whole-window rows and "col=value/..." for segment-sliced ones (drift_detect.segments).
+"""
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .arrow import factorize_arrow_columns, numeric_matrix
+from .cache import table_version
+from .functions import (_align_category_counts, _psi_from_percents, chi_square_statistic, collapse_long_tail,
+                        numeric_drift_kernel)
+from .metrics import divergence_metrics
+from .parallel import factorize_columns, map_columns
+from .profile import bin_counts_from_profile, ks_test_from_profile
+
+RESULT_ARROW_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("window_start", pa.timestamp("us", tz="UTC")),
+    ("feature", pa.string()),
+    ("segment", pa.string()),
+    ("type", pa.string()),
+    ("metric_name", pa.string()),
+    ("statistic", pa.float64()),
+    ("p_value", pa.float64()),
+    ("effect_size", pa.float64()),
+    ("drift_flag", pa.bool_()),
+])
+RESULT_COLUMNS = RESULT_ARROW_SCHEMA.names
+RESULT_SCHEMA = (
+    "run_id STRING, window_start TIMESTAMP, feature STRING, segment STRING, type STRING, metric_name STRING, "
+    "statistic DOUBLE, p_value DOUBLE, effect_size DOUBLE, drift_flag BOOLEAN"
+)
+
+
+class DriftResults:
+    """Result rows accumulated in preallocated column arrays and emitted as one Arrow record batch."""
+
+    def __init__(self, capacity, run_id=None, window_start=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.window_start = pd.Timestamp.now(tz="UTC") if window_start is None else pd.Timestamp(window_start)
+        self.size = 0
+        self.feature = np.empty(capacity, dtype=object)
+        self.segment = np.full(capacity, None, dtype=object)
+        self.type = np.empty(capacity, dtype=object)
+        self.metric_name = np.empty(capacity, dtype=object)
+        self.statistic = np.full(capacity, np.nan)
+        self.p_value = np.full(capacity, np.nan)
+        self.effect_size = np.full(capacity, np.nan)
+        self.drift_flag = np.zeros(capacity, dtype=bool)
+        self.flag_known = np.zeros(capacity, dtype=bool)
+
+    def extend(self, features, feature_type, metric_name, statistic=None, p_value=None, effect_size=None,
+               drift_flag=False, segment=None):
+        # One block of rows sharing a type and metric; None leaves a column null
+        rows = slice(self.size, self.size + len(features))
+        self.feature[rows] = features
+        self.segment[rows] = segment
+        self.type[rows] = feature_type
+        self.metric_name[rows] = metric_name
+        for column, values in ((self.statistic, statistic), (self.p_value, p_value), (self.effect_size, effect_size)):
+            if values is not None:
+                column[rows] = values
+        if drift_flag is not None:
+            self.drift_flag[rows] = drift_flag
+            self.flag_known[rows] = True
+        self.size = rows.stop
+        return self
+
+    def to_arrow(self):
+        n = self.size
+        window_start = self.window_start.tz_localize("UTC") if self.window_start.tz is None else self.window_start
+        arrays = [
+            pa.repeat(pa.scalar(self.run_id, pa.string()), n),
+            pa.repeat(pa.scalar(window_start, RESULT_ARROW_SCHEMA.field("window_start").type), n),
+            pa.array(self.feature[:n], pa.string()),
+            pa.array(self.segment[:n], pa.string()),
+            pa.array(self.type[:n], pa.string()),
+            pa.array(self.metric_name[:n], pa.string()),
+        ]
+        arrays += [pa.array(column[:n], pa.float64(), from_pandas=True)   # NaN -> null
+                   for column in (self.statistic, self.p_value, self.effect_size)]
+        arrays.append(pa.array(self.drift_flag[:n], pa.bool_(), mask=~self.flag_known[:n]))
+        return pa.Table.from_batches([pa.record_batch(arrays, schema=RESULT_ARROW_SCHEMA)])
+
+
+def histogram_metrics(numeric_histograms, categorical_histograms, metrics):
+    """{metric: values for the numeric features, then the categorical ones} from counts already computed.
+
+    numeric_histograms: (expected bin counts, actual bin counts, expected rows, actual rows), bins x features;
+    categorical_histograms: (expected, actual) lists of aligned per-feature category counts.
+    """
+    exp_bins, act_bins, exp_rows, act_rows = numeric_histograms
+    numeric = divergence_metrics(exp_bins, act_bins, metrics, exp_rows, act_rows)
+    categorical = divergence_metrics(*categorical_histograms, metrics)
+    return {name: np.concatenate([numeric[name], categorical[name]]) for name in numeric}
+
+
+def assemble_results(numeric_cols, ks_results, psi_vals, categorical_cols, chi_results, alpha=0.05,
+                     run_id=None, window_start=None, chi_effect_sizes=None, divergences=None):
+    # Arrow table with RESULT_ARROW_SCHEMA, ready for arrow_to_spark(..., RESULT_SCHEMA);
+    # divergences: {metric: values for numeric_cols + categorical_cols} (histogram_metrics)
+    divergences = divergences or {}
+    n_numeric = len(numeric_cols)
+    results = DriftResults((n_numeric + len(categorical_cols)) * (1 + len(divergences)), run_id, window_start)
+
+    # Numeric: KS + PSI
+    ks = np.asarray(ks_results, dtype=float).reshape(-1, 2)
+    psi = np.asarray(psi_vals, dtype=float)
+    results.extend(list(numeric_cols), "numeric", "ks", ks[:, 0], ks[:, 1], psi, (ks[:, 1] < alpha) & (psi > 0.1))
+
+    # Categorical: Chi-square
+    chi = np.asarray(chi_results, dtype=float).reshape(-1, 2)
+    results.extend(list(categorical_cols), "categorical", "chi2", chi[:, 0], chi[:, 1], chi_effect_sizes, chi[:, 1] < alpha)
+
+    for name, values in divergences.items():
+        values = np.asarray(values, dtype=float)
+        results.extend(list(numeric_cols), "numeric", name, values[:n_numeric], drift_flag=None)
+        results.extend(list(categorical_cols), "categorical", name, values[n_numeric:], drift_flag=None)
+    return results.to_arrow()
+
+
+def results_frame(results):
+    return results.to_pandas()
+
+
+def _ks_column(values, profile_row):
+    return ks_test_from_profile(profile_row, values)
+
+
+def _chi_square_codes_column(codes, arg):
+    # (chi2, p, expected counts, actual counts) with the counts aligned on one category codebook
+    uniques, profile_row, max_categories = arg
+    act_counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)), index=[str(u) for u in uniques])
+    act_counts = act_counts[act_counts > 0]   # unused dictionary entries
+    exp_counts = pd.Series(np.asarray(profile_row["category_counts"]), index=list(profile_row["categories"]))
+    exp_aligned, act_aligned = _align_category_counts(exp_counts, act_counts)
+    return (*chi_square_statistic(*collapse_long_tail(exp_aligned, act_aligned, max_categories)), exp_aligned, act_aligned)
+
+
+def _finish_results(numeric_cols, ks_results, numeric_histograms, categorical_cols, chi_outputs, alpha, run_id,
+                    window_start, metrics):
+    # PSI, categorical PSI and the requested divergence metrics all come from the same counts
+    exp_bins, act_bins, exp_rows, act_rows = numeric_histograms
+    psi_vals = _psi_from_percents(exp_bins / exp_rows, act_bins / act_rows)
+    chi_results = [out[:2] for out in chi_outputs]
+    categorical_histograms = ([out[2] for out in chi_outputs], [out[3] for out in chi_outputs])
+    chi_effect_sizes = divergence_metrics(*categorical_histograms, ["psi"])["psi"]
+    divergences = histogram_metrics(numeric_histograms, categorical_histograms, metrics) if metrics else None
+    return assemble_results(numeric_cols, ks_results, psi_vals, categorical_cols, chi_results, alpha, run_id, window_start,
+                            chi_effect_sizes, divergences)
+
+
+def run_drift_tests(profile, current, numeric_cols, categorical_cols, alpha=0.05, executor="serial", max_workers=None,
+                    max_categories=None, numeric_kernel="separate", run_id=None, window_start=None, metrics=()):
+    # Baseline profile + in-memory current window, given as a pandas DataFrame or a pyarrow Table
+    # (PSI for all numeric columns in one vectorized pass)
+    current_matrix = numeric_matrix(current, numeric_cols)
+    numeric_profile = profile.loc[numeric_cols]
+    if numeric_kernel == "fused" and numeric_cols and numeric_profile["ks_exact"].all():
+        # Exact profiles hold the sorted baseline sample, so one sort of the current window yields KS and
+        # PSI together (asymptotic KS p-value); other profiles fall back to the separate tests
+        baseline_sorted = np.column_stack([np.asarray(v, dtype=float) for v in numeric_profile["ks_values"]])
+        buckets = len(numeric_profile["breakpoints"].iloc[0]) - 1
+        kernel = numeric_drift_kernel(baseline_sorted, current_matrix, buckets, expected_sorted=True)
+        exp_bins, act_bins = kernel["expected_bin_counts"], kernel["actual_bin_counts"]
+        ks_results = list(zip(kernel["ks_stat"], kernel["ks_pvalue"]))
+    else:
+        exp_bins, act_bins = bin_counts_from_profile(numeric_profile, current_matrix)
+        ks_results = map_columns(_ks_column, current_matrix, [profile.loc[col] for col in numeric_cols], executor, max_workers)
+    numeric_histograms = (exp_bins, act_bins, numeric_profile["row_count"].to_numpy(dtype=float), len(current_matrix))
+    if isinstance(current, pa.Table):
+        category_codes, category_uniques = factorize_arrow_columns(current, categorical_cols)
+    else:
+        category_codes, category_uniques = factorize_columns(current[categorical_cols])
+    chi_outputs = map_columns(_chi_square_codes_column, category_codes,
+                              [(uniques, profile.loc[col], max_categories)
+                               for col, uniques in zip(categorical_cols, category_uniques)],
+                              executor, max_workers)
+    return _finish_results(numeric_cols, ks_results, numeric_histograms, categorical_cols, chi_outputs, alpha, run_id,
+                           window_start, metrics)
+
+
+def _spark_breakpoints(baseline_sdf, numeric_cols, buckets, breakpoint_cache=None, baseline_table=None):
+    # With a cache and the baseline's table name, breakpoints are recomputed only when its version advances
+    from .spark_backend import spark_quantile_breakpoints
+
+    if not numeric_cols:
+        return np.zeros((buckets + 1, 0))
+    if breakpoint_cache is not None and baseline_table is not None:
+        version = table_version(baseline_table, baseline_sdf.sparkSession)
+        return breakpoint_cache.breakpoints(baseline_table, version, numeric_cols, buckets,
+                                            lambda cols: spark_quantile_breakpoints(baseline_sdf, cols, buckets))
+    return spark_quantile_breakpoints(baseline_sdf, numeric_cols, buckets)
+
+
+def run_spark_drift_tests(baseline_sdf, current_sdf, numeric_cols, categorical_cols, alpha=0.05, buckets=10,
+                          ks_method="exact", kll_k=200, max_categories=None, run_id=None, window_start=None,
+                          breakpoint_cache=None, baseline_table=None, metrics=()):
+    from .sketch import sketch_ks_2samp, spark_kll_sketches
+    from .spark_backend import spark_bin_counts, spark_category_counts, spark_ks_2samp
+
+    breakpoints = _spark_breakpoints(baseline_sdf, numeric_cols, buckets, breakpoint_cache, baseline_table)
+    if numeric_cols:
+        exp_bins, exp_rows = spark_bin_counts(baseline_sdf, numeric_cols, breakpoints)
+        act_bins, act_rows = spark_bin_counts(current_sdf, numeric_cols, breakpoints)
+    else:
+        exp_bins = act_bins = breakpoints[1:]
+        exp_rows = act_rows = np.zeros(0)
+    if ks_method == "sketch":
+        ks_results = [sketch_ks_2samp(b, c) for b, c in zip(spark_kll_sketches(baseline_sdf, numeric_cols, kll_k),
+                                                            spark_kll_sketches(current_sdf, numeric_cols, kll_k))]
+    else:
+        ks_results = spark_ks_2samp(baseline_sdf, current_sdf, numeric_cols)
+    chi_outputs = []
+    for exp_counts, act_counts in zip(spark_category_counts(baseline_sdf, categorical_cols),
+                                      spark_category_counts(current_sdf, categorical_cols)):
+        exp_aligned, act_aligned = _align_category_counts(exp_counts, act_counts)
+        chi_outputs.append((*chi_square_statistic(*collapse_long_tail(exp_aligned, act_aligned, max_categories)),
+                            exp_aligned, act_aligned))
+    return _finish_results(numeric_cols, ks_results, (exp_bins, act_bins, exp_rows, act_rows), categorical_cols,
+                           chi_outputs, alpha, run_id, window_start, metrics)
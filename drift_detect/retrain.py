@@ -0,0 +1,125 @@
+"""Retraining trigger: retrain and register the model when any feature drifted."""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .arrow import numeric_matrix
+from .functions import _chi_square_from_counts, _psi_from_percents
+from .profile import (chi_square_test_from_profile, ks_test_from_profile, population_stability_index_from_profile,
+                      profile_breakpoints)
+
+
+def drift_detected(results_df):
+    return bool(results_df["drift_flag"].any())
+
+
+def feature_priority(features, history=None, importance=None):
+    # Most frequently drifted features first (history: feature -> drift rate, e.g. history.drift_frequency),
+    # ties broken by model feature importance (feature -> importance); unlisted features keep their order
+    keys = pd.DataFrame({
+        "history": pd.Series(history, dtype=float).reindex(features).fillna(0.0),
+        "importance": pd.Series(importance, dtype=float).reindex(features).fillna(0.0),
+    }, index=features)
+    return keys.sort_values(["history", "importance"], ascending=False, kind="stable").index.tolist()
+
+
+def first_drifted_feature(profile, current, numeric_cols, categorical_cols, alpha=0.05, priority=None,
+                          max_categories=None):
+    """Test features one at a time in priority order and return the first that drifted (None if none did).
+
+    Same per-feature verdicts as run_drift_tests, but stops at the first DRIFT, so a retrain can start
+    before the full report is assembled.
+    """
+    numeric = set(numeric_cols)
+    for col in priority or [*numeric_cols, *categorical_cols]:
+        if col in numeric:
+            values = numeric_matrix(current, [col])
+            _, ks_p = ks_test_from_profile(profile.loc[col], values[:, 0])
+            psi_val = population_stability_index_from_profile(profile.loc[[col]], values)[0]
+            if ks_p < alpha and psi_val > 0.1:
+                return col
+        else:
+            values = current.column(col).to_pandas() if isinstance(current, pa.Table) else current[col]
+            _, chi_p = chi_square_test_from_profile(profile.loc[col], values, max_categories)
+            if chi_p < alpha:
+                return col
+    return None
+
+
+def _profile_cdf(profile_row):
+    # (knots, CDF, rows) of the profile's KS values, as planner.summary_ks_2samp takes them, and the CDF's
+    # error bound (one quantile-grid step for a sketch)
+    values = np.asarray(profile_row["ks_values"], dtype=float)
+    values = values[~np.isnan(values)]
+    if not profile_row["ks_exact"]:
+        return (values, np.linspace(0, 1, len(values)), profile_row["row_count"]), 1 / (len(values) - 1)
+    knots = np.unique(values)
+    return (knots, np.searchsorted(values, knots, side="right") / max(len(values), 1), profile_row["row_count"]), 0.0
+
+
+def spark_first_drifted_feature(profile, current_sdf, numeric_cols, categorical_cols, alpha=0.05, priority=None,
+                                max_categories=None, quantile_grid=16, accuracy=10000):
+    """first_drifted_feature for a Spark DataFrame, without collecting it.
+
+    One planned aggregation of the current window (planner.compile_drift_plan on the profile's breakpoints)
+    brings bin counts, a summary CDF and category counts to the driver; features are then judged in priority
+    order. PSI and chi-square match first_drifted_feature; KS compares the summary CDF with the profile's KS
+    values, as run_planned_drift_tests does.
+    """
+    from .planner import spark_plan_summaries, summary_ks_2samp
+
+    breakpoints = profile_breakpoints(profile, numeric_cols)
+    (current,) = spark_plan_summaries([current_sdf], numeric_cols, categorical_cols, breakpoints, quantile_grid, accuracy)
+    numeric = {col: j for j, col in enumerate(numeric_cols)}
+    categorical = {col: j for j, col in enumerate(categorical_cols)}
+    for col in priority or [*numeric_cols, *categorical_cols]:
+        row = profile.loc[col]
+        if col in numeric:
+            j = numeric[col]
+            baseline_cdf, baseline_error = _profile_cdf(row)
+            _, ks_p = summary_ks_2samp(baseline_cdf, current["cdf"][j], baseline_error + current["cdf_error"][j])
+            expected = np.asarray(row["bin_counts"], dtype=float)[:, None] / row["row_count"]
+            psi_val = _psi_from_percents(expected, current["bin_counts"][:, [j]] / max(current["rows"][j], 1))[0]
+            if ks_p < alpha and psi_val > 0.1:
+                return col
+        else:
+            exp_counts = pd.Series(np.asarray(row["category_counts"]), index=list(row["categories"]))
+            _, chi_p = _chi_square_from_counts(exp_counts, current["category_counts"][categorical[col]], max_categories)
+            if chi_p < alpha:
+                return col
+    return None
+
+
+def retrain_model(model_name, experiment="/Shared/drift_retraining_demo"):
+    # Synthetic classification dataset for the retraining demo; returns the new model's test AUC
+    import mlflow
+    import mlflow.sklearn
+    from mlflow.models.signature import infer_signature
+    from sklearn.datasets import make_classification
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    X, y = make_classification(n_samples=2000, n_features=5, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Train logistic regression
+    model = LogisticRegression(max_iter=500)
+    model.fit(X_train, y_train)
+    preds = model.predict_proba(X_test)[:, 1]
+    auc = roc_auc_score(y_test, preds)
+
+    # Log to MLflow with signature + example input
+    signature = infer_signature(X_train, model.predict_proba(X_train))
+    example_input = pd.DataFrame(X_train[:5], columns=[f"f{i}" for i in range(X_train.shape[1])])
+    mlflow.set_experiment(experiment)
+    with mlflow.start_run():
+        mlflow.log_metric("AUC", auc)
+        mlflow.sklearn.log_model(
+            sk_model=model,
+            artifact_path="model",
+            registered_model_name=model_name,
+            signature=signature,
+            input_example=example_input
+        )
+    return auc
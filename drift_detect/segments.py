@@ -0,0 +1,187 @@
+"""Segment-sliced drift: PSI and chi-square per (segment, feature) from one grouped pass.
+
+Rows are grouped by the segment_by columns once. Histograms on the baseline profile breakpoints and
+category counts are accumulated for every segment in the same pass (one bincount per feature locally,
+one groupBy on Spark). All segment x feature tests are then evaluated as array operations. Each segment
+is compared with the whole-window baseline profile, or with the same segment of a baseline table when
+one is given. Numeric features report PSI (metric_name "psi"); categorical features report chi-square
+with categorical PSI as the effect size.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .arrow import numeric_matrix
+from .functions import _psi_from_percents, chi_square_statistic_batch
+from .profile import profile_breakpoints
+from .results import DriftResults
+
+
+def _segment_labels(keys, segment_by):
+    # "region=EU/device=ios" per segment, built column-wise
+    labels = pd.Series("", index=keys.index)
+    for k, col in enumerate(segment_by):
+        values = keys[col].astype(str).where(keys[col].notna(), "null")
+        labels = labels + ("/" if k else "") + f"{col}=" + values
+    return pd.Index(labels.to_numpy())
+
+
+def segment_counts(data, segment_by, numeric_cols, breakpoints, categorical_cols):
+    """Per-segment row counts, PSI bin counts (segments x bins x features) and category counts.
+
+    "keys" holds each segment's segment_by values, in the same order as "segments".
+
+    data is a pandas DataFrame or a pyarrow Table; bins follow np.histogram semantics on breakpoints.
+    """
+    columns = [*segment_by, *categorical_cols]
+    frame = data[columns] if isinstance(data, pd.DataFrame) else data.select(columns).to_pandas()
+    segment_codes = frame.groupby(list(segment_by), sort=False, dropna=False).ngroup().to_numpy()
+    keys = frame[list(segment_by)].drop_duplicates().reset_index(drop=True)
+    segments = _segment_labels(keys, segment_by)
+    n_segments = len(segments)
+
+    n_bins = breakpoints.shape[0] - 1
+    bin_counts = np.zeros((n_segments, n_bins, len(numeric_cols)))
+    values = numeric_matrix(data, numeric_cols)
+    for j in range(len(numeric_cols)):
+        edges = breakpoints[:, j]
+        bins = np.searchsorted(edges, values[:, j], side="right") - 1
+        bins[values[:, j] == edges[-1]] = n_bins - 1   # last bin is closed
+        inside = (bins >= 0) & (bins < n_bins)
+        bin_counts[:, :, j] = np.bincount(segment_codes[inside] * n_bins + bins[inside],
+                                          minlength=n_segments * n_bins).reshape(n_segments, n_bins)
+
+    category_counts = []
+    for col in categorical_cols:
+        codes, uniques = pd.factorize(frame[col])
+        known = codes >= 0
+        counts = np.bincount(segment_codes[known] * len(uniques) + codes[known],
+                             minlength=n_segments * len(uniques)).reshape(n_segments, len(uniques))
+        category_counts.append(pd.DataFrame(counts, index=segments, columns=pd.Index(uniques).astype(str)))
+
+    return {"segments": segments, "keys": keys, "rows": np.bincount(segment_codes, minlength=n_segments).astype(float),
+            "bin_counts": bin_counts, "category_counts": category_counts}
+
+
+def spark_segment_counts(sdf, segment_by, numeric_cols, breakpoints, categorical_cols):
+    # Same output as segment_counts from a single groupBy(segment_by, feature, bucket/category) job
+    from pyspark.sql import functions as F
+
+    from .spark_backend import _bucketize
+
+    bucketed, bucket_cols, _ = _bucketize(sdf, numeric_cols, breakpoints, keep=[*segment_by, *categorical_cols])
+    structs = [F.struct(F.lit(-1).alias("feature_idx"), F.lit(None).cast("string").alias("key"))]   # row counts
+    structs += [F.struct(F.lit(j).alias("feature_idx"), F.col(c).cast("string").alias("key"))
+                for j, c in enumerate([*bucket_cols, *categorical_cols])]
+    counts = (bucketed.select(*segment_by, F.explode(F.array(*structs)).alias("v"))
+              .select(*segment_by, "v.*")
+              .groupBy(*segment_by, "feature_idx", "key").count()
+              .toPandas())
+    return _grouped_segment_counts(counts, segment_by, numeric_cols, breakpoints, categorical_cols)
+
+
+def _grouped_segment_counts(counts, segment_by, numeric_cols, breakpoints, categorical_cols):
+    # spark_segment_counts' collected (segment_by..., feature_idx, key, count) rows -> segment_counts' output.
+    # feature_idx -1 rows count rows; numeric keys are Bucketizer buckets on _bucket_splits
+    from .spark_backend import _bucket_splits, _fold_bucket_counts
+
+    splits_array = [_bucket_splits(breakpoints[:, j]) for j in range(len(numeric_cols))]
+    segment_codes = counts.groupby(list(segment_by), sort=False, dropna=False).ngroup().to_numpy()
+    keys = counts[list(segment_by)].drop_duplicates().reset_index(drop=True)
+    segments = _segment_labels(keys, segment_by)
+    n_segments = len(segments)
+    feature_idx, key_col, n = counts["feature_idx"].to_numpy(), counts["key"], counts["count"].to_numpy(dtype=float)
+
+    rows = np.bincount(segment_codes[feature_idx == -1], weights=n[feature_idx == -1], minlength=n_segments)
+    bin_counts = np.zeros((n_segments, breakpoints.shape[0] - 1, len(numeric_cols)))
+    for j, splits in enumerate(splits_array):
+        selected = (feature_idx == j) & key_col.notna().to_numpy()
+        buckets = key_col[selected].astype(float).to_numpy().astype(int)
+        in_range = buckets < len(splits) - 1   # NaN values land in Bucketizer's extra bucket
+        unique_counts = np.bincount(segment_codes[selected][in_range] * len(splits) + buckets[in_range],
+                                    weights=n[selected][in_range], minlength=n_segments * len(splits))
+        bin_counts[:, :, j] = _fold_bucket_counts(unique_counts.reshape(n_segments, len(splits)), breakpoints[:, j])
+
+    category_counts = []
+    for j, col in enumerate(categorical_cols):
+        selected = (feature_idx == len(numeric_cols) + j) & key_col.notna().to_numpy()
+        codes, uniques = pd.factorize(key_col[selected])
+        table = np.bincount(segment_codes[selected] * len(uniques) + codes, weights=n[selected],
+                            minlength=n_segments * len(uniques)).reshape(n_segments, len(uniques))
+        category_counts.append(pd.DataFrame(table, index=segments, columns=pd.Index(uniques)))
+
+    return {"segments": segments, "keys": keys, "rows": rows, "bin_counts": bin_counts, "category_counts": category_counts}
+
+
+def _segment_results(profile, current, reference, numeric_cols, categorical_cols, alpha, run_id, window_start):
+    segments = current["segments"]
+    n_segments = len(segments)
+    results = DriftResults(n_segments * (len(numeric_cols) + len(categorical_cols)), run_id, window_start)
+    if reference is not None:
+        ref_idx = reference["segments"].get_indexer(segments)
+        missing = ref_idx < 0   # segments without baseline rows get null statistics
+
+    if numeric_cols:
+        actual_percents = current["bin_counts"] / current["rows"][:, None, None]
+        if reference is None:
+            bin_counts = np.column_stack([np.asarray(profile.loc[col, "bin_counts"], dtype=float) for col in numeric_cols])
+            row_counts = profile.loc[numeric_cols, "row_count"].to_numpy(dtype=float)
+            expected_percents = np.broadcast_to(bin_counts / row_counts, actual_percents.shape)
+        else:
+            expected_percents = reference["bin_counts"][ref_idx] / reference["rows"][ref_idx][:, None, None]
+            expected_percents[missing] = np.nan
+        n_bins = actual_percents.shape[1]
+        psi = _psi_from_percents(expected_percents.transpose(1, 0, 2).reshape(n_bins, -1),
+                                 actual_percents.transpose(1, 0, 2).reshape(n_bins, -1))
+        results.extend(np.tile(numeric_cols, n_segments), "numeric", "psi", psi, None, psi, psi > 0.1,
+                       segment=np.repeat(segments.to_numpy(), len(numeric_cols)))
+
+    for j, col in enumerate(categorical_cols):
+        act = current["category_counts"][j]
+        if reference is None:
+            exp = pd.Series(np.asarray(profile.loc[col, "category_counts"], dtype=float),
+                            index=pd.Index(list(profile.loc[col, "categories"])).astype(str))
+            categories = exp.index.union(act.columns, sort=False)
+            exp_counts = exp.reindex(categories, fill_value=0).to_numpy()
+        else:
+            exp = reference["category_counts"][j]
+            categories = exp.columns.union(act.columns, sort=False)
+            exp_counts = exp.reindex(index=segments, columns=categories, fill_value=0).to_numpy(dtype=float)
+        act_counts = act.reindex(columns=categories, fill_value=0).to_numpy(dtype=float)
+        chi2, chi_p = chi_square_statistic_batch(exp_counts, act_counts)
+        exp_counts = np.broadcast_to(exp_counts, act_counts.shape)
+        categorical_psi = _psi_from_percents((exp_counts / exp_counts.sum(axis=1, keepdims=True)).T,
+                                             (act_counts / act_counts.sum(axis=1, keepdims=True)).T)
+        if reference is not None:
+            chi2[missing], chi_p[missing], categorical_psi[missing] = np.nan, np.nan, np.nan
+        results.extend([col] * n_segments, "categorical", "chi2", chi2, chi_p, categorical_psi, chi_p < alpha,
+                       segment=segments.to_numpy())
+    return results.to_arrow()
+
+
+def segment_drift_tests(profile, current, numeric_cols, categorical_cols, segment_by, alpha=0.05, baseline=None,
+                        run_id=None, window_start=None):
+    """PSI / chi-square for every (segment, feature) of a pandas DataFrame or pyarrow Table current window.
+
+    With baseline (same type as current), each segment is compared with the same segment of the baseline
+    on the profile's breakpoints; otherwise with the whole-window baseline profile.
+    """
+    breakpoints = profile_breakpoints(profile, numeric_cols)
+    counts = segment_counts(current, segment_by, numeric_cols, breakpoints, categorical_cols)
+    reference = (segment_counts(baseline, segment_by, numeric_cols, breakpoints, categorical_cols)
+                 if baseline is not None else None)
+    return _segment_results(profile, counts, reference, numeric_cols, categorical_cols, alpha, run_id, window_start)
+
+
+def spark_segment_drift_tests(profile, current_sdf, numeric_cols, categorical_cols, segment_by, alpha=0.05,
+                              baseline_sdf=None, run_id=None, window_start=None):
+    breakpoints = profile_breakpoints(profile, numeric_cols)
+    counts = spark_segment_counts(current_sdf, segment_by, numeric_cols, breakpoints, categorical_cols)
+    reference = (spark_segment_counts(baseline_sdf, segment_by, numeric_cols, breakpoints, categorical_cols)
+                 if baseline_sdf is not None else None)
+    return _segment_results(profile, counts, reference, numeric_cols, categorical_cols, alpha, run_id, window_start)
+
+
+def concat_results(*tables):
+    # Whole-window and segment result tables as one table (one write to the history)
+    return pa.concat_tables(tables).combine_chunks()
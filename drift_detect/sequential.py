@@ -0,0 +1,210 @@
+"""Sequential drift tests that stop reading the current window once each verdict is certain.
+
+The current window arrives in chunks (pandas DataFrames or Arrow tables/record batches) in an order that
+is exchangeable with respect to the feature values, e.g. files or partitions that are not sorted by
+feature. After every chunk, per-feature running counts give the KS distance, PSI and chi-square on the
+rows read so far. A DKW bound with Serfling's finite-population correction then limits how far the
+full-window empirical CDF can be from the sample ECDF. The bound is union-bounded over checks, so the
+chance of any wrong early verdict is at most `delta`. Each statistic is bounded over every window
+consistent with that bound. A feature is settled once the bounds put the batch verdict
+(ks_p < alpha and psi > psi_threshold for numeric features, chi_p < alpha for categorical ones) on one
+side of its threshold. Reading stops when every feature is settled.
+
+Categories not in the baseline are pooled into one bucket. The chi-square statistic is unchanged by
+the pooling, and the degrees of freedom are known up front; no Yates correction is applied. Categorical
+rows report the PSI of the category shares read so far (unseen categories pooled) as their effect size.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import stats
+
+from .functions import _psi_from_percents
+from .results import DriftResults
+
+
+def _sampling_bound(n_read, total_rows, delta):
+    # sup_x |ECDF of the rows read - ECDF of the full window|, with probability >= 1 - delta
+    if n_read >= total_rows:
+        return 0.0
+    return np.sqrt(np.log(2 / delta) * (1 - (n_read - 1) / total_rows) / (2 * n_read))
+
+
+def _convex_sum_bounds(term, estimate, radius, zero_at):
+    # Bounds of sum_i term(q_i) over the box |q_i - estimate_i| <= radius for terms convex in q_i with
+    # their minimum (zero) at zero_at_i
+    lo, hi = np.clip(estimate - radius, 0, 1), np.clip(estimate + radius, 0, 1)
+    nearest = np.clip(zero_at, lo, hi)
+    return term(nearest).sum(), np.maximum(term(lo), term(hi)).sum()
+
+
+def _psi_terms(expected_percents):
+    return lambda q: (expected_percents - q) * np.log((expected_percents + 1e-6) / (q + 1e-6))
+
+
+def _chi_square_terms(baseline_counts, n_window):
+    # Closed-form 2 x K statistic as a function of the window's category shares q
+    n_baseline = baseline_counts.sum()
+
+    def terms(q):
+        totals = n_window * q + baseline_counts
+        return np.divide(n_window * (q * n_baseline - baseline_counts) ** 2, n_baseline * totals,
+                         out=np.zeros_like(totals), where=totals > 0)
+    return terms
+
+
+def _ks_grid(profile_row):
+    # Distinct baseline values and the baseline CDF at each of them
+    values = np.asarray(profile_row["ks_values"], dtype=float)
+    probs = (np.arange(1, len(values) + 1) / len(values) if profile_row["ks_exact"]
+             else np.linspace(0, 1, len(values)))
+    grid = np.unique(values)
+    return grid, probs[np.searchsorted(values, grid, side="right") - 1]
+
+
+def _as_frame(chunk, cols):
+    return chunk[cols] if isinstance(chunk, pd.DataFrame) else chunk.select(cols).to_pandas()
+
+
+def _ipc_batches(batches):
+    # Executor side of spark_chunks: each Arrow batch as one row holding its IPC stream
+    for batch in batches:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        yield pa.RecordBatch.from_pydict({"ipc": [sink.getvalue().to_pybytes()]})
+
+
+def _rechunk(tables, chunk_rows):
+    # Arrow tables of chunk_rows rows (the last one shorter) from a stream of smaller tables
+    pending, n_pending = [], 0
+    for table in tables:
+        pending.append(table)
+        n_pending += table.num_rows
+        while n_pending >= chunk_rows:
+            merged = pa.concat_tables(pending)
+            yield merged.slice(0, chunk_rows)
+            pending, n_pending = [merged.slice(chunk_rows)], n_pending - chunk_rows
+    if n_pending:
+        yield pa.concat_tables(pending)
+
+
+def spark_chunks(sdf, chunk_rows=100_000):
+    # Arrow chunks pulled one partition at a time; partitions after an early stop are never computed.
+    # Executors encode their partitions' Arrow batches (mapInArrow), so no rows are converted one by one.
+    encoded = sdf.mapInArrow(_ipc_batches, "ipc BINARY")
+    tables = (pa.ipc.open_stream(row["ipc"]).read_all() for row in encoded.toLocalIterator(prefetchPartitions=True))
+    return _rechunk(tables, chunk_rows)
+
+
+def sequential_drift_tests(profile, chunks, numeric_cols, categorical_cols, total_rows, alpha=0.05, delta=0.01,
+                           psi_threshold=0.1, run_id=None, window_start=None):
+    """Early-stopping run_drift_tests over an iterable of current-window chunks.
+
+    total_rows is the size of the full current window (e.g. a Delta row count). Returns the results table
+    (statistics on the rows each feature read, p-values at the full window size so that drift_flag agrees
+    with p_value < alpha) and a pandas Series of rows read per feature. Categorical nulls are dropped, as in
+    run_drift_tests.
+    """
+    numeric_cols, categorical_cols = list(numeric_cols), list(categorical_cols)
+    features = numeric_cols + categorical_cols
+    state = {}
+    for col in numeric_cols:
+        row = profile.loc[col]
+        grid, baseline_cdf = _ks_grid(row)
+        state[col] = {
+            "grid": grid, "baseline_cdf": baseline_cdf, "n_baseline": row["row_count"],
+            "sketch_error": 0.0 if row["ks_exact"] else 1 / (len(row["ks_values"]) - 1),
+            "breakpoints": np.asarray(row["breakpoints"], dtype=float),
+            "expected_percents": np.asarray(row["bin_counts"], dtype=float) / row["row_count"],
+            "le_counts": np.zeros(len(grid) + 1), "lt_counts": np.zeros(len(grid) + 1),
+            "bin_counts": np.zeros(len(row["bin_counts"])),
+        }
+    for col in categorical_cols:
+        row = profile.loc[col]
+        state[col] = {
+            "categories": pd.Index(list(row["categories"])),
+            "baseline_counts": np.append(np.asarray(row["category_counts"], dtype=float), 0.0),   # + unseen bucket
+            "counts": np.zeros(len(row["categories"]) + 1),   # non-null values only, as in run_drift_tests
+        }
+    rows_read = pd.Series(0, index=features, dtype="int64")
+    verdicts, estimates = {}, {}
+
+    for check, chunk in enumerate(chunks, start=1):
+        open_cols = [col for col in features if col not in verdicts]
+        frame = _as_frame(chunk, open_cols)
+        rows_read[open_cols] += len(frame)
+        bound_delta = delta / (check * (check + 1))
+
+        for col in open_cols:
+            s, n = state[col], rows_read[col]
+            if "grid" in s:
+                eps = _sampling_bound(n, total_rows, bound_delta)
+                values = frame[col].to_numpy(dtype=float)
+                s["le_counts"] += np.bincount(np.searchsorted(s["grid"], values, side="left"), minlength=len(s["grid"]) + 1)
+                s["lt_counts"] += np.bincount(np.searchsorted(s["grid"], values, side="right"), minlength=len(s["grid"]) + 1)
+                s["bin_counts"] += np.histogram(values, bins=s["breakpoints"])[0]
+                # KS distance between the baseline CDF and the ECDF so far, evaluated at and just below each grid value
+                cdf_at = np.cumsum(s["le_counts"])[:-1] / n
+                cdf_below = np.cumsum(s["lt_counts"])[:-1] / n
+                ks_stat = max(np.abs(s["baseline_cdf"] - cdf_at).max(),
+                              np.abs(np.append(0.0, s["baseline_cdf"][:-1]) - cdf_below).max())
+                psi_val = _psi_from_percents(s["expected_percents"][:, None], (s["bin_counts"] / n)[:, None])[0]
+                # p-value at the full window size, the sample size the verdict is about
+                n_eff = np.round(s["n_baseline"] * total_rows / (s["n_baseline"] + total_rows))
+                estimates[col] = (ks_stat, stats.kstwo.sf(ks_stat, n_eff), psi_val)
+
+                critical = stats.kstwo.isf(alpha, n_eff)
+                ks_radius = eps + s["sketch_error"]
+                # Bin shares are differences of two CDF values, so each moves by at most 2 * eps
+                psi_lo, psi_hi = _convex_sum_bounds(_psi_terms(s["expected_percents"]), s["bin_counts"] / n, 2 * eps,
+                                                    s["expected_percents"])
+                if ks_stat - ks_radius > critical and psi_lo > psi_threshold:
+                    verdicts[col] = True
+                elif ks_stat + ks_radius <= critical or psi_hi <= psi_threshold:
+                    verdicts[col] = False
+            else:
+                codes = s["categories"].get_indexer(frame[col].dropna().astype(str))
+                codes[codes < 0] = len(s["categories"])
+                s["counts"] += np.bincount(codes, minlength=len(s["counts"]))
+                n_values = s["counts"].sum()
+                if not n_values:
+                    continue
+                # The non-null values read are a sample of the window's non-null values (at most total_rows)
+                eps = _sampling_bound(n_values, total_rows, bound_delta) if n < total_rows else 0.0
+                shares = s["counts"] / n_values
+                # Statistic and bounds for the full window's non-null values, projected from the rows read
+                n_window = total_rows * n_values / n
+                terms = _chi_square_terms(s["baseline_counts"], n_window)
+                baseline_shares = s["baseline_counts"] / s["baseline_counts"].sum()
+                chi_lo, chi_hi = _convex_sum_bounds(terms, shares, 2 * eps, baseline_shares)
+                observed = s["counts"] + s["baseline_counts"] > 0
+                window_chi2 = terms(shares).sum()
+                categorical_psi = _psi_from_percents(baseline_shares[:, None], shares[:, None])[0]
+                estimates[col] = (window_chi2, stats.chi2.sf(window_chi2, max(observed.sum() - 1, 1)), categorical_psi)
+                # The unseen bucket may or may not end up non-empty: drift must clear the larger df
+                n_categories = len(s["categories"])
+                if chi_lo > stats.chi2.isf(alpha, n_categories):
+                    verdicts[col] = True
+                elif chi_hi <= stats.chi2.isf(alpha, max(n_categories - 1, 1)):
+                    verdicts[col] = False
+        if len(verdicts) == len(features):
+            break
+
+    # Chunks ran out before a feature settled (e.g. total_rows overstated): fall back to the point verdict
+    for col in numeric_cols:
+        if col not in verdicts and col in estimates:
+            ks_stat, ks_p, psi_val = estimates[col]
+            verdicts[col] = ks_p < alpha and psi_val > psi_threshold
+    for col in categorical_cols:
+        if col not in verdicts and col in estimates:
+            verdicts[col] = estimates[col][1] < alpha
+
+    results = DriftResults(len(features), run_id, window_start)
+    numeric = np.array([estimates.get(col, (np.nan,) * 3) for col in numeric_cols], dtype=float).reshape(-1, 3)
+    results.extend(numeric_cols, "numeric", "ks", numeric[:, 0], numeric[:, 1], numeric[:, 2],
+                   [verdicts.get(col, False) for col in numeric_cols])
+    chi = np.array([estimates.get(col, (np.nan,) * 3) for col in categorical_cols], dtype=float).reshape(-1, 3)
+    results.extend(categorical_cols, "categorical", "chi2", chi[:, 0], chi[:, 1], chi[:, 2],
+                   [verdicts.get(col, False) for col in categorical_cols])
+    return results.to_arrow(), rows_read
@@ -0,0 +1,142 @@
+"""Spark-native drift backend: same tests as drift_detect.functions, computed from Spark DataFrames.
+
+Only per-column aggregates (quantiles, bucket/category counts, per-partition CDF extremes) reach the
+driver, so the tables are never collected; grouped counts come back as Arrow batches.
+"""
+import numpy as np
+import pandas as pd
+from pyspark.ml.feature import Bucketizer
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+from scipy import stats
+
+from .arrow import spark_to_arrow
+from .functions import _chi_square_from_counts, _psi_from_percents
+
+
+def get_spark(spark=None):
+    return spark or SparkSession.getActiveSession() or SparkSession.builder.getOrCreate()
+
+
+def _explode_columns(sdf, cols, value_name, cast):
+    # Wide -> long (feature_idx, value) so one groupBy covers every column in a single job
+    structs = [F.struct(F.lit(j).alias("feature_idx"), F.col(c).cast(cast).alias(value_name)) for j, c in enumerate(cols)]
+    return sdf.select(F.explode(F.array(*structs)).alias("v")).select("v.*")
+
+
+def spark_quantile_breakpoints(sdf, cols, buckets=10, relative_error=1e-4):
+    probabilities = np.linspace(0, 1, buckets + 1).tolist()
+    return np.array(sdf.approxQuantile(list(cols), probabilities, relative_error), dtype=float).T
+
+
+def _bucket_splits(edges):
+    # Bucketizer needs strictly increasing splits and closes its last bucket, so bucket on the distinct
+    # edges (plus a one-ulp bucket for the top edge, padded with +-inf); _fold_bucket_counts maps the
+    # bucket counts back onto the PSI bins with np.histogram semantics
+    unique_edges = np.unique(edges)
+    return [-np.inf, *unique_edges.tolist(), float(np.nextafter(unique_edges[-1], np.inf)), np.inf]
+
+
+def _fold_bucket_counts(unique_counts, edges):
+    # unique_counts[..., b]: rows in bucket b of _bucket_splits(edges) -> [..., PSI bin] counts
+    unique_edges = np.unique(edges)
+    bucket_of_edge = np.searchsorted(unique_edges, edges) + 1
+    counts = np.where(edges[:-1] < edges[1:], unique_counts[..., bucket_of_edge[:-1]], 0)
+    counts[..., -1] += unique_counts[..., len(unique_edges)]   # values equal to the top edge
+    return counts
+
+
+def _bucketize(sdf, cols, breakpoints, keep=()):
+    splits_array = [_bucket_splits(breakpoints[:, j]) for j in range(len(cols))]
+    bucket_cols = [f"__bucket_{j}" for j in range(len(cols))]
+    bucketed = Bucketizer(splitsArray=splits_array, inputCols=list(cols), outputCols=bucket_cols,
+                          handleInvalid="keep").transform(sdf.select(*keep, *cols))
+    return bucketed, bucket_cols, splits_array
+
+
+def spark_bin_counts(sdf, cols, breakpoints):
+    bucketed, bucket_cols, splits_array = _bucketize(sdf, cols, breakpoints)
+    grouped = spark_to_arrow(_explode_columns(bucketed, bucket_cols, "bucket", "int")
+                             .groupBy("feature_idx", "bucket").count()).to_pandas()
+    feature_idx = grouped["feature_idx"].to_numpy(dtype=np.int64)
+    bucket = grouped["bucket"].fillna(-1).to_numpy(dtype=np.int64)   # null: NaN input
+    n = grouped["count"].to_numpy(dtype=float)
+    row_counts = np.bincount(feature_idx, weights=n, minlength=len(cols))
+
+    counts = np.zeros((breakpoints.shape[0] - 1, len(cols)))
+    for j, splits in enumerate(splits_array):
+        # The last bucket (len(splits) - 1) holds NaN values
+        valid = (feature_idx == j) & (bucket >= 0) & (bucket < len(splits) - 1)
+        unique_counts = np.bincount(bucket[valid], weights=n[valid], minlength=len(splits))
+        counts[:, j] = _fold_bucket_counts(unique_counts, breakpoints[:, j])
+    return counts, row_counts
+
+
+def spark_population_stability_index(baseline_sdf, current_sdf, cols, buckets=10, relative_error=1e-4, breakpoints=None):
+    # breakpoints: cached (buckets + 1) x len(cols) baseline quantiles; skips the approxQuantile pass
+    if breakpoints is None:
+        breakpoints = spark_quantile_breakpoints(baseline_sdf, cols, buckets, relative_error)
+    expected_counts, expected_rows = spark_bin_counts(baseline_sdf, cols, breakpoints)
+    actual_counts, actual_rows = spark_bin_counts(current_sdf, cols, breakpoints)
+    return _psi_from_percents(expected_counts / expected_rows, actual_counts / actual_rows)
+
+
+def spark_category_counts(sdf, cols):
+    grouped = spark_to_arrow(_explode_columns(sdf, cols, "category", "string")
+                             .where(F.col("category").isNotNull())
+                             .groupBy("feature_idx", "category").count()).to_pandas()
+    by_feature = dict(list(grouped.groupby("feature_idx", sort=False)))
+    return [by_feature[j].set_index("category")["count"].astype("int64").rename_axis(None).rename(None)
+            if j in by_feature else pd.Series(dtype="int64") for j in range(len(cols))]
+
+
+def spark_chi_square_test(baseline_sdf, current_sdf, cols, max_categories=None):
+    baseline_counts = spark_category_counts(baseline_sdf, cols)
+    current_counts = spark_category_counts(current_sdf, cols)
+    return [_chi_square_from_counts(exp_counts, act_counts, max_categories)
+            for exp_counts, act_counts in zip(baseline_counts, current_counts)]
+
+
+def spark_ks_2samp(baseline_sdf, current_sdf, cols):
+    # Exact two-sample KS statistic: per-value counts from both sides are range-partitioned and sorted,
+    # every partition reports the extremes of its local CDF difference, and the driver chains partitions
+    # with their running offsets. The p-value uses the asymptotic distribution (ks_2samp method="asymp").
+    n_baseline = np.array(baseline_sdf.select(*[F.count(c) for c in cols]).first(), dtype=float)
+    n_current = np.array(current_sdf.select(*[F.count(c) for c in cols]).first(), dtype=float)
+
+    combined = (_explode_columns(baseline_sdf, cols, "value", "double").withColumn("side", F.lit(0))
+                .unionByName(_explode_columns(current_sdf, cols, "value", "double").withColumn("side", F.lit(1)))
+                .where(F.col("value").isNotNull()))
+    value_counts = (combined.groupBy("feature_idx", "value")
+                    .agg(F.sum(1 - F.col("side")).alias("n_baseline"), F.sum("side").alias("n_current"))
+                    .repartitionByRange("feature_idx", "value")
+                    .sortWithinPartitions("feature_idx", "value"))
+
+    def partition_extremes(batches):
+        state = {}
+        for pdf in batches:
+            for feature_idx, group in pdf.groupby("feature_idx", sort=False):
+                first_value, cum_b, cum_c, max_dev, min_dev = state.get(feature_idx, (group["value"].iloc[0], 0, 0, 0.0, 0.0))
+                cdf_b = cum_b + group["n_baseline"].cumsum().to_numpy()
+                cdf_c = cum_c + group["n_current"].cumsum().to_numpy()
+                dev = cdf_b / n_baseline[feature_idx] - cdf_c / n_current[feature_idx]
+                state[feature_idx] = (first_value, cdf_b[-1], cdf_c[-1], max(max_dev, dev.max()), min(min_dev, dev.min()))
+        yield pd.DataFrame([(k, *v) for k, v in state.items()],
+                           columns=["feature_idx", "first_value", "n_baseline", "n_current", "max_dev", "min_dev"])
+
+    summaries = (value_counts
+                 .mapInPandas(partition_extremes, "feature_idx INT, first_value DOUBLE, n_baseline LONG, "
+                                                  "n_current LONG, max_dev DOUBLE, min_dev DOUBLE")
+                 .toPandas()
+                 .sort_values(["feature_idx", "first_value"]))
+
+    results = []
+    for j in range(len(cols)):
+        ks_stat, offset_b, offset_c = 0.0, 0, 0
+        for part in summaries[summaries["feature_idx"] == j].itertuples():
+            base = offset_b / n_baseline[j] - offset_c / n_current[j]
+            ks_stat = max(ks_stat, abs(base + part.max_dev), abs(base + part.min_dev))
+            offset_b, offset_c = offset_b + part.n_baseline, offset_c + part.n_current
+        en = n_baseline[j] * n_current[j] / (n_baseline[j] + n_current[j])
+        results.append((ks_stat, stats.kstwo.sf(ks_stat, np.round(en))))
+    return results
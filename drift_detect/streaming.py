@@ -0,0 +1,152 @@
+"""Incremental drift monitoring over a Delta table with Structured Streaming.
+
+Each micro-batch of new rows is bucketed on the baseline profile breakpoints and folded into running
+bin/category counts; PSI / chi-square rows (results.RESULT_SCHEMA, run_id "<stream id>-<batch id>") are
+merged into the drift history table (history.write_drift_history). The stream checkpoint
+guarantees history is never re-read, and the persisted state lets a restarted stream resume its counts.
+Delete the state table together with the checkpoint when resetting a stream.
+"""
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .functions import _align_category_counts, _psi_from_percents, chi_square_statistic
+from .history import write_drift_history
+from .results import DriftResults
+
+STREAM_STATE_SCHEMA = (
+    "feature STRING, type STRING, last_batch_id LONG, row_count LONG, bin_counts ARRAY<DOUBLE>, "
+    "categories ARRAY<STRING>, category_counts ARRAY<LONG>"
+)
+
+
+def _empty_stream_counts(state):
+    state["row_counts"] = np.zeros(len(state["numeric_cols"]))
+    state["bin_counts"] = np.zeros_like(state["breakpoints"][1:])
+    state["category_counts"] = [pd.Series(dtype="int64") for _ in state["categorical_cols"]]
+
+
+def _load_stream_counts(state, stored):
+    # stored: saved state rows (STREAM_STATE_SCHEMA layout) indexed by feature
+    for j, col in enumerate(state["numeric_cols"]):
+        state["row_counts"][j] = stored.loc[col, "row_count"]
+        state["bin_counts"][:, j] = stored.loc[col, "bin_counts"]
+    for j, col in enumerate(state["categorical_cols"]):
+        state["category_counts"][j] = pd.Series(np.asarray(stored.loc[col, "category_counts"], dtype="int64"),
+                                                index=list(stored.loc[col, "categories"]))
+
+
+def _stream_state_rows(state, marker):
+    # One row per feature; marker fills the third column (last batch id, or last table version)
+    rows = [(col, "numeric", marker, int(state["row_counts"][j]), state["bin_counts"][:, j].tolist(), None, None)
+            for j, col in enumerate(state["numeric_cols"])]
+    rows += [(col, "categorical", marker, int(counts.sum()), None, [str(c) for c in counts.index], counts.tolist())
+             for col, counts in zip(state["categorical_cols"], state["category_counts"])]
+    return rows
+
+
+def init_stream_state(profile, numeric_cols, categorical_cols, table=None, spark=None):
+    state = {
+        "numeric_cols": list(numeric_cols),
+        "categorical_cols": list(categorical_cols),
+        "breakpoints": (np.column_stack([np.asarray(profile.loc[col, "breakpoints"], dtype=float) for col in numeric_cols])
+                        if numeric_cols else np.zeros((0, 0))),
+        "last_batch_id": -1,
+    }
+    _empty_stream_counts(state)
+    if table is None:
+        return state
+    from .spark_backend import get_spark
+
+    if get_spark(spark).catalog.tableExists(table):
+        stored = get_spark(spark).table(table).toPandas().set_index("feature")
+        state["last_batch_id"] = int(stored["last_batch_id"].max())
+        _load_stream_counts(state, stored)
+    return state
+
+
+def save_stream_state(state, table, spark=None):
+    from .spark_backend import get_spark
+
+    rows = _stream_state_rows(state, state["last_batch_id"])
+    get_spark(spark).createDataFrame(rows, schema=STREAM_STATE_SCHEMA).write.mode("overwrite").saveAsTable(table)
+
+
+def stream_drift_results(state, profile, alpha=0.05, run_id=None, window_start=None):
+    # Arrow table with results.RESULT_ARROW_SCHEMA; features with no rows yet are skipped
+    numeric = [j for j in range(len(state["numeric_cols"])) if state["row_counts"][j] > 0]
+    categorical = [j for j, counts in enumerate(state["category_counts"]) if not counts.empty]
+    results = DriftResults(len(numeric) + len(categorical), run_id, window_start)
+
+    actual_percents = state["bin_counts"][:, numeric] / state["row_counts"][numeric]
+    expected_percents = np.empty_like(actual_percents)
+    for k, j in enumerate(numeric):
+        col = state["numeric_cols"][j]
+        expected_percents[:, k] = np.asarray(profile.loc[col, "bin_counts"], dtype=float) / profile.loc[col, "row_count"]
+    psi = _psi_from_percents(expected_percents, actual_percents)
+    results.extend([state["numeric_cols"][j] for j in numeric], "numeric", "psi", psi, None, psi, psi > 0.1)
+
+    chi, categorical_psi = [], []
+    for j in categorical:
+        col = state["categorical_cols"][j]
+        exp_counts = pd.Series(np.asarray(profile.loc[col, "category_counts"]), index=list(profile.loc[col, "categories"]))
+        exp_aligned, act_aligned = _align_category_counts(exp_counts, state["category_counts"][j])
+        chi.append(chi_square_statistic(exp_aligned, act_aligned))
+        categorical_psi.append(_psi_from_percents((exp_aligned / exp_aligned.sum())[:, None],
+                                                  (act_aligned / act_aligned.sum())[:, None])[0])
+    chi = np.asarray(chi, dtype=float).reshape(-1, 2)
+    results.extend([state["categorical_cols"][j] for j in categorical], "categorical", "chi2", chi[:, 0], chi[:, 1],
+                   categorical_psi, chi[:, 1] < alpha)
+    return results.to_arrow()
+
+
+def make_stream_batch_handler(state, profile, output_table, state_table, mode="cumulative", alpha=0.05):
+    from .spark_backend import spark_bin_counts, spark_category_counts
+
+    stream_id = uuid.uuid4().hex   # one per started stream; restarts get a new id
+
+    def handle_batch(batch_df, batch_id):
+        if batch_id <= state["last_batch_id"] or batch_df.isEmpty():
+            return   # replayed batch already folded into the persisted state, or nothing new
+        batch_df.persist()
+        try:
+            if state["numeric_cols"]:
+                bin_counts, row_counts = spark_bin_counts(batch_df, state["numeric_cols"], state["breakpoints"])
+            category_counts = spark_category_counts(batch_df, state["categorical_cols"])
+        finally:
+            batch_df.unpersist()
+
+        if mode == "tumbling":
+            _empty_stream_counts(state)
+        if state["numeric_cols"]:
+            state["bin_counts"] += bin_counts
+            state["row_counts"] += row_counts
+        state["category_counts"] = [running.add(new, fill_value=0).astype("int64")
+                                    for running, new in zip(state["category_counts"], category_counts)]
+        state["last_batch_id"] = batch_id
+
+        spark = batch_df.sparkSession
+        results = stream_drift_results(state, profile, alpha, run_id=f"{stream_id}-{batch_id}")
+        write_drift_history(results, output_table, spark)
+        save_stream_state(state, state_table, spark)
+    return handle_batch
+
+
+def start_drift_stream(profile, source_table, numeric_cols, categorical_cols, output_table, state_table,
+                       checkpoint, trigger="5 minutes", mode="cumulative", alpha=0.05, spark=None):
+    from .spark_backend import get_spark
+
+    spark = get_spark(spark)
+    state = init_stream_state(profile, numeric_cols, categorical_cols, state_table, spark=spark)
+    return (
+        spark.readStream
+             .option("skipChangeCommits", "true")   # only appended rows; overwrites of the table are ignored
+             .table(source_table)
+             .select(*numeric_cols, *categorical_cols)
+             .writeStream
+             .foreachBatch(make_stream_batch_handler(state, profile, output_table, state_table, mode, alpha))
+             .option("checkpointLocation", checkpoint)
+             .trigger(processingTime=trigger)
+             .start()
+    )
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _bucketizer(values, splits):
+    # pyspark.ml.feature.Bucketizer with handleInvalid="keep": last bucket closed, NaN in an extra bucket
+    buckets = np.clip(np.searchsorted(splits, values, side="right") - 1, 0, len(splits) - 2).astype(float)
+    buckets[np.isnan(values)] = len(splits) - 1
+    return buckets
+
+
+@pytest.fixture
+def spark_grouped_counts():
+    """The (segment_by..., feature_idx, key, count) frame spark_segment_counts collects, built with pandas."""
+    pytest.importorskip("pyspark")
+    from drift_detect.spark_backend import _bucket_splits
+
+    def build(frame, segment_by, numeric_cols, breakpoints, categorical_cols):
+        parts = [frame[segment_by].assign(feature_idx=-1, key=None)]
+        for j, col in enumerate(numeric_cols):
+            buckets = _bucketizer(frame[col].to_numpy(dtype=float), _bucket_splits(breakpoints[:, j]))
+            parts.append(frame[segment_by].assign(feature_idx=j, key=pd.Series(buckets, index=frame.index).astype(str)))
+        for j, col in enumerate(categorical_cols):
+            key = frame[col].astype(object).where(frame[col].notna(), None)
+            parts.append(frame[segment_by].assign(feature_idx=len(numeric_cols) + j, key=key.map(
+                lambda v: None if v is None else str(v))))
+        rows = pd.concat(parts, ignore_index=True)
+        return (rows.groupby([*segment_by, "feature_idx", "key"], dropna=False, sort=False)
+                .size().rename("count").reset_index())
+
+    return build
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from drift_detect import backfill_drift, build_baseline_profile, profile_breakpoints
+from drift_detect.backfill import _DAY_COL, _EPOCH, _run_chunks
+from drift_detect.segments import _grouped_segment_counts
+
+
+def test_spark_shaped_daily_counts_match_local_backfill(spark_grouped_counts, tmp_path):
+    rng = np.random.default_rng(1)
+    baseline = pd.DataFrame({"x": rng.normal(size=4_000), "c": rng.choice(list("abc"), 4_000)})
+    profile = build_baseline_profile(baseline, ["x"], ["c"]).set_index("feature", drop=False)
+    source = pd.DataFrame({
+        "x": rng.normal(0.2, 1, 6_000),
+        "c": rng.choice(list("abcd"), 6_000),
+        "event_time": pd.Timestamp("2024-03-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 10 * 86400, 6_000), unit="s"),
+    })
+    local = backfill_drift(profile, source, "event_time", ["x"], ["c"], chunk_days=4)
+
+    # spark_backfill_drift's count_days, with the groupBy job replaced by its collected result
+    breakpoints = profile_breakpoints(profile, ["x"])
+    daily = source.assign(**{_DAY_COL: (source["event_time"] - _EPOCH) // pd.Timedelta(days=1)})
+
+    def count_days(lo, hi):
+        days = daily[(daily[_DAY_COL] >= lo) & (daily[_DAY_COL] < hi)]
+        grouped = spark_grouped_counts(days, [_DAY_COL], ["x"], breakpoints, ["c"])
+        return _grouped_segment_counts(grouped, [_DAY_COL], ["x"], breakpoints, ["c"])
+
+    first, end = int(daily[_DAY_COL].min()), int(daily[_DAY_COL].max()) + 1
+    spark_path = _run_chunks(count_days, profile, ["x"], ["c"], first, end, 0.05, 4, tmp_path)
+
+    key = ["run_id", "feature", "metric_name"]
+    expected = local.to_pandas().sort_values(key).reset_index(drop=True)
+    actual = spark_path.to_pandas().sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual[key + ["window_start", "drift_flag"]], expected[key + ["window_start", "drift_flag"]])
+    np.testing.assert_allclose(actual["statistic"], expected["statistic"])
+    np.testing.assert_allclose(actual["effect_size"], expected["effect_size"])
@@ -0,0 +1,19 @@
+import numpy as np
+from scipy import stats
+
+from drift_detect.functions import numeric_drift_kernel
+
+
+def test_numeric_drift_kernel_leaves_fortran_ordered_read_only_input_untouched():
+    rng = np.random.default_rng(0)
+    expected = np.asfortranarray(rng.normal(size=(500, 3)))
+    actual = np.asfortranarray(rng.normal(0.3, 1, size=(400, 3)))
+    expected_copy, actual_copy = expected.copy(), actual.copy()
+    expected.flags.writeable = actual.flags.writeable = False
+
+    result = numeric_drift_kernel(expected, actual)
+
+    np.testing.assert_array_equal(expected, expected_copy)
+    np.testing.assert_array_equal(actual, actual_copy)
+    for j in range(3):
+        assert np.isclose(result["ks_stat"][j], stats.ks_2samp(expected[:, j], actual[:, j]).statistic)
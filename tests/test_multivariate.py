@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift_detect import multivariate_drift_tests
+
+
+def _frame(rng, n, rho):
+    # Same N(0, 1) marginals for any rho: only the joint distribution moves
+    x = rng.normal(size=n)
+    y = rho * x + np.sqrt(1 - rho ** 2) * rng.normal(size=n)
+    return pd.DataFrame({"x": x, "y": y, "c": rng.choice(list("abc"), n)})
+
+
+@pytest.mark.parametrize("method", ["mmd", "classifier"])
+def test_joint_shift_is_flagged_and_unshifted_is_not(method):
+    if method == "classifier":
+        pytest.importorskip("sklearn")
+    rng = np.random.default_rng(0)
+    baseline = _frame(rng, 20_000, 0.0)
+
+    def run(current):
+        return multivariate_drift_tests(baseline, current, ["x", "y"], ["c"], method=method).to_pylist()[0]
+
+    unshifted, shifted = run(_frame(rng, 20_000, 0.0)), run(_frame(rng, 20_000, 0.8))
+
+    assert not unshifted["drift_flag"] and shifted["drift_flag"]
+    assert shifted["statistic"] > unshifted["statistic"]
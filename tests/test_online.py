@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from drift_detect import ADWIN, DDM, PageHinkley
+
+
+def _per_event_indices(detector, values):
+    return [i for i, value in enumerate(values) if detector.update([value]).drift_detected]
+
+
+def _with_nans(rng, values, share=0.1):
+    values = values.astype(float)
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+
+@pytest.mark.parametrize("make, stream", [
+    (lambda: PageHinkley(threshold=20),
+     lambda rng: np.concatenate([rng.normal(0, 1, 2_000), rng.normal(2, 1, 2_000), rng.normal(-1, 1, 2_000)])),
+    (lambda: DDM(),
+     lambda rng: np.concatenate([rng.random(3_000) < 0.1, rng.random(3_000) < 0.4]).astype(float)),
+], ids=["page_hinkley", "ddm"])
+def test_batch_update_matches_per_event_updates(make, stream):
+    rng = np.random.default_rng(0)
+    values = _with_nans(rng, stream(rng))
+
+    batch = make().update(values)
+    per_event = _per_event_indices(make(), values)
+
+    assert len(per_event) > 0
+    assert batch.drift_indices.tolist() == per_event
+    assert not np.isnan(values[batch.drift_indices]).any()
+
+
+def test_adwin_indices_are_batch_positions():
+    rng = np.random.default_rng(1)
+    clean = np.concatenate([rng.normal(0, 1, 8_192), rng.normal(3, 1, 8_192)])
+    values = np.insert(clean, np.arange(0, len(clean), 4), np.nan)   # a NaN before every fourth value
+
+    on_clean, on_values = ADWIN(clock=256).update(clean), ADWIN(clock=256).update(values)
+
+    assert len(on_clean.drift_indices) > 0
+    assert np.array_equal(values[on_values.drift_indices], clean[on_clean.drift_indices])
+    assert np.array_equal(on_values.drift_indices, on_clean.drift_indices + on_clean.drift_indices // 4 + 1)
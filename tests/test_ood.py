@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from drift_detect import build_baseline_profile, ood_scores
+
+
+def test_injected_outliers_rank_highest():
+    rng = np.random.default_rng(0)
+    baseline = pd.DataFrame({"x": rng.normal(size=20_000), "c": rng.choice(list("abc"), 20_000, p=[0.6, 0.3, 0.1])})
+    profile = build_baseline_profile(baseline, ["x"], ["c"]).set_index("feature", drop=False)
+
+    current = pd.DataFrame({"x": rng.normal(size=1_000), "c": rng.choice(list("abc"), 1_000, p=[0.6, 0.3, 0.1])})
+    outliers = rng.choice(len(current), 20, replace=False)
+    current.loc[outliers[:10], "x"] = rng.normal(8, 1, 10)   # far beyond the baseline range
+    current.loc[outliers[10:], "c"] = "unseen"
+
+    scores = ood_scores(profile, current, ["x"], ["c"], chunk_rows=300)
+
+    assert set(np.argsort(scores)[-20:]) == set(outliers)
+    assert np.allclose(scores, ood_scores(profile, pa.Table.from_pandas(current), ["x"], ["c"]))
@@ -0,0 +1,38 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from drift_detect import file_statistics, prescreen_drift
+
+
+def _write(path, x, c):
+    pq.write_table(pa.table({"x": x, "c": c}), path, row_group_size=10_000)
+    return file_statistics(path)
+
+
+def test_in_range_shift_is_scanned_not_settled(tmp_path):
+    rng = np.random.default_rng(0)
+    baseline = _write(tmp_path / "baseline.parquet", rng.normal(size=100_000), rng.choice(list("abc"), 100_000))
+    current = _write(tmp_path / "current.parquet", rng.normal(0.45, 0.8, 100_000),
+                     rng.choice(list("abc"), 100_000, p=[0.6, 0.3, 0.1]))
+
+    results, scan_numeric, scan_categorical = prescreen_drift(baseline, current, ["x"], ["c"])
+
+    assert results.num_rows == 0
+    assert scan_numeric == ["x"] and scan_categorical == ["c"]
+
+
+def test_range_shift_and_null_explosion_are_flagged(tmp_path):
+    rng = np.random.default_rng(1)
+    baseline = _write(tmp_path / "baseline.parquet", rng.normal(size=50_000), rng.choice(list("abc"), 50_000))
+    c = rng.choice(list("abc"), 50_000).astype(object)
+    c[: 25_000] = None
+    # Row groups of the current file sorted by x: the upper half of them lie entirely above the baseline range
+    x = np.sort(np.concatenate([rng.normal(size=25_000), rng.normal(20, 1, 25_000)]))
+    current = _write(tmp_path / "current.parquet", x, c)
+
+    results, scan_numeric, scan_categorical = prescreen_drift(baseline, current, ["x"], ["c"])
+
+    flagged = results.to_pandas().set_index("feature")
+    assert sorted(flagged.index) == ["c", "x"] and flagged["drift_flag"].all()
+    assert scan_numeric == [] and scan_categorical == []
@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+
+from drift_detect import build_baseline_profile, first_drifted_feature, run_drift_tests
+
+
+def test_first_drifted_feature_ignores_nulls_like_run_drift_tests():
+    rng = np.random.default_rng(0)
+    categories = np.array(["a", "b", "c"])
+    baseline = pd.DataFrame({"x": rng.normal(size=5_000), "cat": categories[rng.integers(0, 3, 5_000)]})
+    current = pd.DataFrame({"x": rng.normal(size=5_000),
+                            "cat": pd.Series(categories[rng.integers(0, 3, 5_000)], dtype=object)})
+    current.loc[current.index % 3 == 0, "cat"] = None
+    profile = build_baseline_profile(baseline, ["x"], ["cat"]).set_index("feature", drop=False)
+
+    results = run_drift_tests(profile, current, ["x"], ["cat"]).to_pandas()
+    assert not results["drift_flag"].any()
+    assert first_drifted_feature(profile, current, ["x"], ["cat"]) is None
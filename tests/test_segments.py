@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from drift_detect import HistogramStore, build_baseline_profile, profile_breakpoints
+from drift_detect.segments import _grouped_segment_counts, segment_counts
+
+
+def _frames(seed=0, rows=5_000):
+    rng = np.random.default_rng(seed)
+    baseline = pd.DataFrame({"x": rng.normal(size=rows), "c": rng.choice(list("abc"), rows)})
+    current = pd.DataFrame({
+        "x": np.where(rng.random(rows) < 0.05, np.nan, rng.normal(0.3, 1, rows)),
+        "c": rng.choice(list("abcd"), rows),
+        "region": rng.choice(["eu", "us"], rows),
+        "ts": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 72 * 3600, rows), unit="s"),
+    })
+    profile = build_baseline_profile(baseline, ["x"], ["c"]).set_index("feature", drop=False)
+    return profile, current
+
+
+def test_grouped_counts_match_local_segment_counts(spark_grouped_counts):
+    profile, current = _frames()
+    breakpoints = profile_breakpoints(profile, ["x"])
+    local = segment_counts(current, ["region"], ["x"], breakpoints, ["c"])
+    grouped = _grouped_segment_counts(spark_grouped_counts(current, ["region"], ["x"], breakpoints, ["c"]),
+                                      ["region"], ["x"], breakpoints, ["c"])
+
+    order = grouped["segments"].get_indexer(local["segments"])
+    assert list(grouped["keys"].columns) == ["region"]
+    assert grouped["keys"]["region"].tolist() == grouped["segments"].str.replace("region=", "").tolist()
+    np.testing.assert_array_equal(grouped["rows"][order], local["rows"])
+    np.testing.assert_array_equal(grouped["bin_counts"][order], local["bin_counts"])
+    expected = local["category_counts"][0]
+    actual = grouped["category_counts"][0].iloc[order].reindex(columns=expected.columns)
+    np.testing.assert_array_equal(actual.to_numpy(), expected.to_numpy())
+
+
+def test_spark_shaped_counts_fold_into_histogram_store(spark_grouped_counts):
+    profile, current = _frames()
+    local = HistogramStore(profile, ["x"], ["c"]).ingest(current, "ts")
+
+    spark_path = HistogramStore(profile, ["x"], ["c"])
+    hourly = current.assign(__hour=(current["ts"] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(hours=1))
+    grouped = spark_grouped_counts(hourly, ["__hour"], ["x"], spark_path.breakpoints, ["c"])
+    spark_path._add_segment_counts(_grouped_segment_counts(grouped, ["__hour"], ["x"], spark_path.breakpoints, ["c"]))
+
+    assert spark_path.start == local.start
+    np.testing.assert_array_equal(spark_path.cum_rows, local.cum_rows)
+    np.testing.assert_array_equal(spark_path.cum_bins, local.cum_bins)
+    np.testing.assert_array_equal(spark_path.cum_categories[0], local.cum_categories[0])
+
+
+def test_histogram_store_reingest_from_last_hour_does_not_double_count():
+    profile, current = _frames()
+    once = HistogramStore(profile, ["x"], ["c"]).ingest(current, "ts")
+
+    first_run = current[current["ts"] < pd.Timestamp("2024-01-02 12:30", tz="UTC")]
+    store = HistogramStore(profile, ["x"], ["c"]).ingest(first_run, "ts")
+    for _ in range(2):   # the next run, then a rerun of it
+        store.ingest(current, "ts", since=store.last_hour, replace=True)
+
+    assert store.start == once.start
+    np.testing.assert_array_equal(store.cum_rows, once.cum_rows)
+    np.testing.assert_array_equal(store.cum_bins, once.cum_bins)
+    np.testing.assert_array_equal(store.cum_categories[0], once.cum_categories[0])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from drift_detect import build_baseline_profile, run_drift_tests, sequential_drift_tests
+
+
+def _frame(rng, n, loc=0.0, p=(0.5, 0.3, 0.2), null_share=0.0):
+    c = rng.choice(list("abc"), n, p=p).astype(object)
+    c[rng.random(n) < null_share] = None
+    return pd.DataFrame({"x": rng.normal(loc, 1, n), "c": c})
+
+
+def _sequential(profile, current, chunk_rows=20_000):
+    chunks = (current.iloc[i: i + chunk_rows] for i in range(0, len(current), chunk_rows))
+    results, rows_read = sequential_drift_tests(profile, chunks, ["x"], ["c"], total_rows=len(current))
+    return results.to_pandas().set_index("feature"), rows_read
+
+
+def test_null_bearing_categoricals_agree_with_run_drift_tests():
+    rng = np.random.default_rng(0)
+    profile = build_baseline_profile(_frame(rng, 20_000, null_share=1 / 3), ["x"], ["c"]).set_index("feature", drop=False)
+    current = _frame(rng, 200_000, null_share=1 / 3)
+
+    sequential, _ = _sequential(profile, current)
+    full = run_drift_tests(profile, current, ["x"], ["c"]).to_pandas().set_index("feature")
+
+    assert not sequential.loc["c", "drift_flag"] and not full.loc["c", "drift_flag"]
+    assert sequential.loc["c", "statistic"] < 20
+
+
+def test_verdicts_match_run_drift_tests_and_p_values():
+    rng = np.random.default_rng(1)
+    profile = build_baseline_profile(_frame(rng, 20_000), ["x"], ["c"]).set_index("feature", drop=False)
+    current = _frame(rng, 200_000, loc=0.5, p=(0.3, 0.3, 0.4), null_share=0.1)
+
+    sequential, rows_read = _sequential(profile, current)
+    full = run_drift_tests(profile, current, ["x"], ["c"]).to_pandas().set_index("feature")
+
+    assert sequential["drift_flag"].all() and full["drift_flag"].all()
+    assert (sequential["p_value"] < 0.05).all()
+    assert (rows_read < len(current)).all()
@@ -0,0 +1,44 @@
+import numpy as np
+from scipy import stats
+
+from drift_detect import KLLSketch, sketch_ks_2samp
+
+
+def _sketch(values, seed):
+    sketch = KLLSketch(seed=seed)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+    return sketch
+
+
+def test_same_distribution_is_not_flagged():
+    rng = np.random.default_rng(0)
+    baseline, current = rng.normal(size=1_000_000), rng.normal(size=500_000)
+
+    ks_stat, p_value = sketch_ks_2samp(_sketch(baseline, 1), _sketch(current, 2))
+    exact = stats.ks_2samp(baseline, current)
+
+    assert abs(ks_stat - exact.statistic) <= 0.02
+    assert p_value >= exact.pvalue and p_value > 0.05
+
+
+def test_shift_is_flagged_like_ks_2samp():
+    rng = np.random.default_rng(3)
+    baseline, current = rng.normal(size=200_000), rng.normal(0.1, 1, 200_000)
+
+    ks_stat, p_value = sketch_ks_2samp(_sketch(baseline, 4), _sketch(current, 5))
+    exact = stats.ks_2samp(baseline, current)
+
+    assert abs(ks_stat - exact.statistic) <= 0.02
+    assert p_value < 0.05 and exact.pvalue < 0.05
+
+
+def test_uncompacted_sketches_are_exact():
+    rng = np.random.default_rng(6)
+    baseline, current = rng.normal(size=100), rng.normal(0.5, 1, 120)
+
+    ks_stat, p_value = sketch_ks_2samp(KLLSketch().update(baseline), KLLSketch().update(current))
+    exact = stats.ks_2samp(baseline, current)
+
+    assert np.isclose(ks_stat, exact.statistic)
+    assert np.isclose(p_value, stats.kstwo.sf(exact.statistic, round(100 * 120 / 220)))